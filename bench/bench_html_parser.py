@@ -0,0 +1,78 @@
+"""
+Benchmark: HTML parser backends (src/html_parser.py) on a large catalog listing.
+
+Usage:
+    python bench/bench_html_parser.py
+    python bench/bench_html_parser.py --page saved_listing.html
+
+Reports parse time and peak Python memory per backend for the link list
+(search_make / get_models), and checks that every backend returns the same
+links as the html.parser reference. The submodel tables (get_submodels) and
+full tree are always built with html.parser and are timed once.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.html_parser as html_parser
+from bench_spec_extract import synthetic_page
+
+
+def measure(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page", help="Saved HTML page to parse instead of a synthetic one")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.page:
+        with open(args.page, encoding='utf-8', errors='replace') as f:
+            html = f.read()
+    else:
+        html = synthetic_page(0, rows=3000)
+    print(f"Page size: {len(html) // 1024} KiB")
+
+    backends = ['html.parser']
+    if html_parser.HAS_LXML:
+        backends.append('lxml')
+    if html_parser.HAS_SELECTOLAX:
+        backends.append('selectolax')
+
+    _, t_full, m_full = measure(lambda: html_parser.make_soup(html), args.repeat)
+    _, t_tables, m_tables = measure(
+        lambda: html_parser.make_soup(html, parse_only=html_parser.STRAIN_TABLES), args.repeat)
+    print(f"{'trees':12s} tables {t_tables * 1000:7.1f} ms {m_tables / 2**20:6.1f} MiB | "
+          f"full tree {t_full * 1000:7.1f} ms {m_full / 2**20:6.1f} MiB")
+
+    reference = None
+    failed = False
+    for backend in backends:
+        html_parser.BACKEND = backend
+        links, t_links, m_links = measure(lambda: html_parser.iter_links(html), args.repeat)
+        if reference is None:
+            reference = links
+        same = links == reference
+        failed |= not same
+        print(f"{backend:12s} links {t_links * 1000:7.1f} ms {m_links / 2**20:6.1f} MiB | "
+              f"{'identical' if same else 'MISMATCH'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Benchmark: single-pass spec extraction vs. the original per-key regex loop.
+
+Usage:
+    python bench/bench_spec_extract.py                 # synthetic spec pages
+    python bench/bench_spec_extract.py --pages saved/  # directory of saved *.html spec pages
+
+Every page is checked for identical results before timing.
+"""
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from src.spec_extract import SPEC_PATTERNS, extract_specs, normalize_text
+
+
+def legacy_extract(text_content):
+    """The loop get_specs used before src/spec_extract.py."""
+    specs = {}
+    for key, pat_list in SPEC_PATTERNS.items():
+        for pat in pat_list:
+            m = re.search(pat, text_content, re.IGNORECASE)
+            if m:
+                specs[key] = m.group(1)
+                break
+    return specs
+
+
+def synthetic_page(seed, rows=600):
+    """A large catalog-like spec page: navigation, long spec tables, footer."""
+    rnd = random.Random(seed)
+    nav = " ".join(f"<a href='/make/m{i}.html'>Make {i} power tools {rnd.randint(1, 999)}</a>" for i in range(300))
+    cells = []
+    for i in range(rows):
+        label = rnd.choice(["Wheelbase", "Front track", "Rear track", "Fuel tank", "Gear ratio",
+                            "Bore x stroke", "Compression", "Tyres", "Drag coefficient"])
+        cells.append(f"<tr><td>{label}:</td><td>{rnd.randint(10, 9999)} mm / {rnd.random():.2f} in</td></tr>")
+    core = (
+        "<tr><td>Displacement:</td><td>{d} cm3</td></tr>"
+        "<tr><td>Power:</td><td>{kw} kW / {ps} PS / {hp} hp</td></tr>"
+        "<tr><td>Torque:</td><td>{nm} Nm / {lb} lb-ft</td></tr>"
+        "<tr><td>Curb weight:</td><td>{kg} kg</td></tr>"
+        "<tr><td>Top speed:</td><td>{vmax} km/h</td></tr>"
+        "<tr><td>0- 100 km/h:</td><td>{acc}</td></tr>"
+    ).format(d=rnd.randint(998, 6500), kw=rnd.randint(50, 600), ps=rnd.randint(70, 800),
+             hp=rnd.randint(70, 800), nm=rnd.randint(100, 900), lb=rnd.randint(70, 650),
+             kg=rnd.randint(900, 2500), vmax=rnd.randint(150, 350), acc=round(rnd.uniform(2.5, 14), 1))
+    cells.insert(rnd.randint(0, rows), core)
+    footer = "Manufactured and sold in 2017. " * 5
+    return (f"<html><head><title>2017 Test Car {seed}</title></head><body>{nav}"
+            f"<table>{''.join(cells)}</table><p>{footer}</p></body></html>")
+
+
+def page_text(html):
+    return normalize_text(BeautifulSoup(html, 'html.parser').get_text(" ", strip=True))
+
+
+def timeit(fn, texts, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Directory with saved spec page HTML files")
+    parser.add_argument("--count", type=int, default=20, help="Synthetic pages to generate")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.pages:
+        htmls = []
+        for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+            with open(path, encoding='utf-8', errors='replace') as f:
+                htmls.append(f.read())
+    else:
+        htmls = [synthetic_page(seed) for seed in range(args.count)]
+    if not htmls:
+        print("No pages found.")
+        return 1
+
+    texts = [page_text(h) for h in htmls]
+    # Pages where the lazy "power ... PS" fallback has to run
+    texts += [t.replace(" kW", " kw-ish") for t in texts[:5]]
+
+    mismatches = 0
+    for i, t in enumerate(texts):
+        a, b = legacy_extract(t), extract_specs(t)
+        if a != b:
+            mismatches += 1
+            print(f"[MISMATCH] page {i}: legacy={a} new={b}")
+    print(f"{len(texts)} pages, {mismatches} mismatches, avg {sum(map(len, texts)) // len(texts)} chars")
+
+    legacy_t = timeit(legacy_extract, texts, args.repeat)
+    new_t = timeit(extract_specs, texts, args.repeat)
+    per_page = 1000 / len(texts)
+    print(f"legacy loop : {legacy_t * per_page:8.3f} ms/page")
+    print(f"single pass : {new_t * per_page:8.3f} ms/page")
+    print(f"speedup     : {legacy_t / new_t:8.2f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
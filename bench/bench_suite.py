@@ -0,0 +1,281 @@
+"""
+Offline benchmark suite: scraper parsing and poster rendering on recorded fixtures.
+
+Usage:
+    python bench/bench_suite.py                      # run, compare with bench/baseline.json
+    python bench/bench_suite.py --save-baseline      # run and store the results as the baseline
+    python bench/bench_suite.py --check              # gate: also fail without a baseline to compare with
+    python bench/bench_suite.py --only parse --repeat 30
+    python bench/bench_suite.py --fixtures saved/    # pages saved from the site (same layout)
+
+No network is used: catalog pages come from bench/fixtures/pages (paths
+mirror the site's URLs, see bench/make_fixtures.py) and car images from
+bench/fixtures/images. Every case is run once to warm up, then --repeat
+times; the median is compared with the baseline. Peak Python memory is
+measured in a separate traced run. Exits with 1 when a case's median time
+or peak memory is more than --tolerance above its baseline. Timings depend
+on the machine, so the baseline is not committed: record it once with
+--save-baseline on the machine that runs the gate. With --check a missing
+baseline, or a case the baseline does not cover, is a failure too.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from contextlib import redirect_stdout
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+    from src.scraper_robust import CarScraper
+from src.batch import run_batch
+from src.image_store import ImageStore
+from src.output_spec import encode
+from src.pipeline import scrape_car_data
+from src.poster import PosterGenerator
+from src.rate_limit import FetchError
+
+# Differences below these are noise, whatever the relative change
+MIN_TIME_DELTA = 0.0005
+MIN_MEMORY_DELTA = 256 * 1024
+
+
+class FixtureScraper(CarScraper):
+    """CarScraper that reads pages and images from the fixture corpus instead of the site."""
+
+    def __init__(self, fixtures_dir, images, image_dir):
+        # image_dir keeps the image store out of ./cache
+        super().__init__(use_drission=False, cache=False, index=False, spec_store=False,
+                         images=ImageStore(root=image_dir))
+        self.pages_dir = os.path.join(fixtures_dir, "pages")
+        self.image_paths = images
+
+    def _get_html(self, url):
+        path = url[len(self.BASE_URL):] if url.startswith(self.BASE_URL) else url.lstrip('/')
+        file_path = os.path.join(self.pages_dir, path or "index.html")
+        if not os.path.isfile(file_path):
+            raise FetchError(url, "not in fixtures", 404)
+        with open(file_path, encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    def fetch_image(self, url):
+        # Any stable picture will do; the same URL always maps to the same file
+        return self.image_paths[zlib.crc32(url.encode()) % len(self.image_paths)] if url else None
+
+
+def load_fixtures(fixtures_dir):
+    with open(os.path.join(fixtures_dir, "manifest.json"), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    def read(rel):
+        with open(os.path.join(fixtures_dir, "pages", rel), encoding='utf-8', errors='replace') as f:
+            return rel, f.read()
+
+    return {
+        'homepage': read(manifest['homepage'])[1],
+        'make_pages': [read(rel) for rel in manifest['make_pages']],
+        'model_pages': [read(rel) for rel in manifest['model_pages']],
+        'spec_pages': [read(rel) for rel in manifest['spec_pages']],
+        'images': [os.path.join(fixtures_dir, "images", name) for name in manifest['images']],
+        'jobs': manifest['jobs'],
+    }
+
+
+def measure(fn, repeat):
+    """Runs fn once to warm up, then repeat times. Returns (timings, peak traced bytes)."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings, peak
+
+
+def summarize(timings, peak, items):
+    ordered = sorted(timings)
+    return {
+        'runs': len(timings),
+        'items': items,
+        'median_s': statistics.median(ordered),
+        'min_s': ordered[0],
+        'p90_s': ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+        'stdev_s': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'peak_bytes': peak,
+    }
+
+
+def build_cases(fixtures, work_dir, repeat, batch_workers, output_spec):
+    """[(name, fn, repeat, items)]: items is how many pages/posters one call of fn handles."""
+    scraper = FixtureScraper(work_dir['fixtures'], fixtures['images'], work_dir['images'])
+    gen = PosterGenerator(output_dir=work_dir['output'], cutout_dir=work_dir['cutouts'], output_spec=output_spec)
+    gen.warm_up()
+    base_url = scraper.BASE_URL
+    jobs = fixtures['jobs']
+    car_data = scrape_car_data(scraper, jobs[0]['make'], jobs[0]['model'])
+    image = gen.render(car_data)
+    render_repeat = max(3, repeat // 3)
+    batch_repeat = max(3, repeat // 5)
+
+    def parse_makes():
+        links = scraper._absolute_links(fixtures['homepage'])
+        for job in jobs:
+            scraper._match_make(links, job['make'], exact=True)
+
+    def parse_models():
+        for _, html in fixtures['make_pages']:
+            scraper._parse_models(html)
+
+    def parse_submodels():
+        for _, html in fixtures['model_pages']:
+            scraper._parse_submodels(html)
+
+    def parse_specs():
+        for rel, html in fixtures['spec_pages']:
+            scraper._parse_specs(html, base_url + rel)
+
+    def scrape_single():
+        scrape_car_data(scraper, jobs[0]['make'], jobs[0]['model'])
+
+    def encode_outputs():
+        for variant in gen.output_spec:
+            encode(image, variant)
+
+    def batch():
+        results = run_batch(jobs, scraper, gen, workers=batch_workers)
+        failed = [r for r in results if r['status'] != 'ok']
+        if failed:
+            raise RuntimeError(f"batch job failed: {failed[0]['error']}")
+
+    return [
+        ("parse.makes", parse_makes, repeat, len(jobs)),
+        ("parse.models", parse_models, repeat, len(fixtures['make_pages'])),
+        ("parse.submodels", parse_submodels, repeat, len(fixtures['model_pages'])),
+        ("parse.specs", parse_specs, repeat, len(fixtures['spec_pages'])),
+        ("scrape.single", scrape_single, repeat, 1),
+        ("render.compose", lambda: gen.render(car_data), render_repeat, 1),
+        ("render.encode", encode_outputs, render_repeat, len(gen.output_spec)),
+        ("poster.single", lambda: gen.create_poster(car_data), render_repeat, 1),
+        ("batch.throughput", batch, batch_repeat, len(jobs)),
+    ]
+
+
+def compare(name, result, baseline, tolerance):
+    """Returns (status text, regressed)."""
+    base = baseline.get(name)
+    if not base:
+        return "new", False
+    regressions = []
+    time_delta = result['median_s'] - base['median_s']
+    if time_delta > base['median_s'] * tolerance and time_delta > MIN_TIME_DELTA:
+        regressions.append("time")
+    mem_delta = result['peak_bytes'] - base['peak_bytes']
+    if mem_delta > base['peak_bytes'] * tolerance and mem_delta > MIN_MEMORY_DELTA:
+        regressions.append("memory")
+    change = f"{time_delta / base['median_s'] * 100:+.0f}%" if base['median_s'] else "n/a"
+    if regressions:
+        return f"{change} REGRESSION ({', '.join(regressions)})", True
+    return change, False
+
+
+def machine_info():
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(), 'cpus': os.cpu_count()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=os.path.join(BENCH_DIR, "fixtures"),
+                        help="Fixture corpus (manifest.json, pages/, images/)")
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--check", action="store_true",
+                        help="Fail when there is no baseline or it lacks a case (for CI / pre-merge gates)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown / memory growth over the baseline (0.25 = 25%%)")
+    parser.add_argument("--repeat", type=int, default=15, help="Timed runs per parse case (render/batch run fewer)")
+    parser.add_argument("--batch-workers", type=int, default=2)
+    parser.add_argument("--output-spec", default=None, help="Output formats for the render cases, e.g. png,webp:85")
+    parser.add_argument("--only", help="Run only cases whose name contains this")
+    args = parser.parse_args()
+
+    if args.check and args.save_baseline:
+        parser.error("--check and --save-baseline are exclusive")
+    if args.check and not os.path.exists(args.baseline):
+        print(f"FAILED: no baseline at {args.baseline}; record one with --save-baseline first.")
+        return 1
+    if not os.path.exists(os.path.join(args.fixtures, "manifest.json")):
+        print(f"No fixture corpus in {args.fixtures}; run bench/make_fixtures.py first.")
+        return 2
+    fixtures = load_fixtures(args.fixtures)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            stored = json.load(f)
+        baseline = stored['cases']
+        if stored.get('machine') != machine_info():
+            print(f"[WARN] Baseline was recorded on a different machine/Python: {stored.get('machine')}")
+
+    tmp = tempfile.mkdtemp(prefix="autoposter-bench-")
+    work_dir = {'fixtures': args.fixtures, 'output': os.path.join(tmp, "output"),
+                'cutouts': os.path.join(tmp, "cutouts"), 'images': os.path.join(tmp, "images")}
+    results = {}
+    regressed = False
+    print(f"{'case':18} {'runs':>4} {'median ms':>10} {'min ms':>9} {'p90 ms':>9} {'stdev':>7} "
+          f"{'per item':>9} {'peak MiB':>9}  vs baseline")
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            cases = build_cases(fixtures, work_dir, args.repeat, args.batch_workers, args.output_spec)
+        for name, fn, repeat, items in cases:
+            if args.only and args.only not in name:
+                continue
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                timings, peak = measure(fn, repeat)
+            result = results[name] = summarize(timings, peak, items)
+            status, bad = compare(name, result, baseline, args.tolerance)
+            if args.check and status == "new":
+                status, bad = "MISSING from baseline", True
+            regressed |= bad
+            print(f"{name:18} {result['runs']:>4} {result['median_s'] * 1000:>10.2f} {result['min_s'] * 1000:>9.2f} "
+                  f"{result['p90_s'] * 1000:>9.2f} {result['stdev_s'] / result['median_s'] * 100:>6.1f}% "
+                  f"{result['median_s'] / items * 1000:>7.2f}ms {peak / 2**20:>9.2f}  {status}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if 'batch.throughput' in results:
+        r = results['batch.throughput']
+        print(f"Batch throughput: {r['items'] / r['median_s']:.1f} posters/s ({args.batch_workers} workers)")
+
+    if args.save_baseline:
+        if args.only and os.path.exists(args.baseline):
+            # Update only the cases that ran
+            with open(args.baseline, encoding='utf-8') as f:
+                results = {**json.load(f)['cases'], **results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'machine': machine_info(), 'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       'cases': results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}; rerun with --save-baseline to record one.")
+    elif regressed:
+        print(f"FAILED: regression beyond {args.tolerance:.0%} of the baseline"
+              f"{' or cases missing from it' if args.check else ''}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+Writes the offline fixture corpus used by bench/bench_suite.py.
+
+Usage:
+    python bench/make_fixtures.py                  # (re)writes bench/fixtures/
+    python bench/make_fixtures.py --out other_dir
+
+The pages reproduce the structure the scraper parses on automobile-catalog.com
+(homepage make links, make pages with model links, model pages with submodel
+tables, spec pages with the blue image cell) at realistic sizes, with
+navigation noise around them. Page paths mirror the site's URL paths, so a
+directory of pages saved from the real site can be used in their place.
+Output is deterministic: the same corpus is written on every run.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+from PIL import Image, ImageDraw, ImageFilter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# (make, model, year range, submodel body names)
+CARS = [
+    ("Aston Martin", "DB11", "2016-2023", ["V8", "V12", "AMR", "Volante"]),
+    ("Audi", "TT RS", "2016-2023", ["Coupe", "Roadster", "Iconic Edition"]),
+    ("BMW", "M3", "2014-2020", ["Sedan", "Competition", "CS"]),
+    ("Ferrari", "F8 Tributo", "2019-2023", ["Coupe", "Spider"]),
+    ("Porsche", "911", "2019-2024", ["Carrera", "Carrera S", "Turbo S", "GT3"]),
+    ("Toyota", "GR Supra", "2019-2024", ["2.0", "3.0", "A91 Edition"]),
+    ("Ford", "Mustang", "2015-2023", ["EcoBoost", "GT", "Mach 1"]),
+    ("Hyundai", "i30 N", "2017-2024", ["Performance", "Fastback"]),
+]
+FILLER_MAKES = ["Acura", "Alfa Romeo", "Alpine", "Bentley", "Buick", "Cadillac", "Chevrolet", "Chrysler",
+                "Citroen", "Cupra", "Dacia", "Dodge", "Fiat", "Genesis", "GMC", "Honda", "Infiniti", "Jaguar",
+                "Jeep", "Kia", "Lamborghini", "Lancia", "Land Rover", "Lexus", "Lincoln", "Lotus", "Maserati",
+                "Mazda", "McLaren", "Mercedes-Benz", "Mini", "Mitsubishi", "Nissan", "Opel", "Pagani",
+                "Peugeot", "Renault", "Rolls-Royce", "Saab", "Seat", "Skoda", "Subaru", "Suzuki", "Tesla",
+                "Volkswagen", "Volvo"]
+MODEL_WORDS = ["Coupe", "Sport", "GT", "Touring", "Cabrio", "Estate", "Line", "Classic", "Series", "Turbo"]
+FILLER_LABELS = ["Wheelbase", "Front track", "Rear track", "Fuel tank", "Gear ratio", "Bore x stroke",
+                 "Compression", "Tyres", "Drag coefficient", "Turning circle", "Luggage space"]
+NAV_LINKS = 120
+
+
+def slug(text):
+    return text.lower().replace(' ', '_').replace('-', '_')
+
+
+def nav(rnd):
+    """Header/sidebar links every catalog page carries (photos, news, other makes)."""
+    links = [f"<a href='/photo/p{rnd.randint(1, 99999)}.html'>Photo gallery {i}</a>" for i in range(NAV_LINKS // 3)]
+    links += [f"<a href='/news/{i}.html'>News {rnd.randint(1, 999)}</a>" for i in range(NAV_LINKS // 3)]
+    links += [f"<a href='/list.php?p={i}'>{i}</a>" for i in range(NAV_LINKS // 3)]
+    return "<div class='nav'>" + " | ".join(links) + "</div>"
+
+
+def page(title, rnd, body):
+    return (f"<!DOCTYPE html>\n<html><head><title>{title}</title>"
+            f"<meta charset='utf-8'><link rel='stylesheet' href='/css/main.css'></head><body>\n"
+            f"{nav(rnd)}\n{body}\n<div class='footer'>{'Automobile catalog footer text. ' * 20}</div>"
+            f"\n</body></html>\n")
+
+
+def homepage(rnd):
+    makes = sorted({m for m, *_ in CARS} | set(FILLER_MAKES))
+    links = "\n".join(f"<a href='/make/{slug(m)}.html'>{m}</a>" for m in makes)
+    return page("Automobile catalog", rnd, f"<div class='makes'>\n{links}\n</div>")
+
+
+def make_page(rnd, make, model, years, count=60):
+    entries = []
+    for i in range(count):
+        y0 = rnd.randint(1960, 2018)
+        name = f"{make} {rnd.choice(MODEL_WORDS)} {rnd.randint(1, 900)}"
+        entries.append((name, f"{y0}-{y0 + rnd.randint(2, 9)}"))
+    entries.insert(rnd.randint(0, count), (f"{make} {model}", years))
+    rows = "\n".join(f"<tr><td><a href='/model/{slug(make)}/{slug(name[len(make) + 1:])}.html'>{name} {yrs}</a>"
+                     f"</td><td><a href='/photo/{slug(name)}.html'>photo</a></td></tr>" for name, yrs in entries)
+    return page(f"{make} models", rnd, f"<table class='models'>\n{rows}\n</table>")
+
+
+def submodel_table(rnd, make, model, body, years):
+    y0, y1 = years.split('-')
+    year = rnd.randint(int(y0), int(y1))
+    return (f"<table><tr><td><p style=\"font-size: 14pt;monospace\">{make} {model} {body}</p>\n"
+            f"<p style=\"font-size: 12pt\">Cars belonging to this submodel were produced in years {y0} - {y1}, "
+            f"{rnd.choice(['coupe', 'sedan', 'convertible', 'hatchback'])}, "
+            f"{rnd.randint(2, 5)} doors, {rnd.randint(2, 5)} seats</p>\n"
+            f"<img src=\"/picto30/{slug(make)}_{slug(model)}_{slug(body)}.jpg\">\n"
+            f"<a href=\"/make/{slug(make)}/{slug(model)}/{slug(body)}/{year}.html\">details</a></td></tr></table>")
+
+
+def model_page(rnd, make, model, years, bodies):
+    tables = [submodel_table(rnd, make, model, body, years) for body in bodies]
+    # Unrelated tables (ads, comparisons) the parser has to skip
+    for i in range(20):
+        tables.insert(rnd.randint(0, len(tables)),
+                      f"<table><tr><td><p>Compare with other cars {i}</p><a href='/compare/{i}.html'>compare</a>"
+                      f"</td></tr></table>")
+    return page(f"{make} {model} {years}", rnd, "\n".join(tables))
+
+
+def spec_page(rnd, make, model, body, year, rows=250):
+    cells = [f"<tr><td>{rnd.choice(FILLER_LABELS)}:</td><td>{rnd.randint(10, 9999)} mm / {rnd.random():.2f} in</td></tr>"
+             for _ in range(rows)]
+    core = (
+        "<tr><td>Displacement:</td><td>{d} cm3</td></tr>"
+        "<tr><td>Power:</td><td>{kw} kW / {ps} PS / {hp} hp</td></tr>"
+        "<tr><td>Torque:</td><td>{nm} Nm / {lb} lb-ft</td></tr>"
+        "<tr><td>Curb weight:</td><td>{kg} kg</td></tr>"
+        "<tr><td>Top speed:</td><td>{vmax} km/h</td></tr>"
+        "<tr><td>0- 100 km/h:</td><td>{acc}</td></tr>"
+    ).format(d=rnd.randint(998, 6500), kw=rnd.randint(150, 600), ps=rnd.randint(200, 800),
+             hp=rnd.randint(200, 800), nm=rnd.randint(250, 900), lb=rnd.randint(180, 650),
+             kg=rnd.randint(1200, 2000), vmax=rnd.randint(220, 340), acc=round(rnd.uniform(2.8, 6.5), 1))
+    cells.insert(rnd.randint(0, rows), core)
+    images = (f"<table><tr><td style=\"background:#3333FF\"><img src=\"/picto30/{slug(make)}_{slug(model)}_big.jpg\" "
+              f"width=\"400\"></td></tr></table>\n"
+              + "".join(f"<img src=\"/pictocrop/{slug(make)}_{i}.jpg\" width=\"120\">" for i in range(10)))
+    return page(f"{year} {make} {model} {body}", rnd, f"{images}\n<table>{''.join(cells)}</table>")
+
+
+def car_image(path, size, body_color, seed):
+    """A studio-style side view on a light background, standing in for a catalog photo."""
+    rnd = random.Random(seed)
+    w, h = size
+    img = Image.new("RGB", size, (236, 236, 238))
+    draw = ImageDraw.Draw(img)
+    for y in range(h // 2, h):
+        shade = 236 - (y - h // 2) * 40 // h
+        draw.line([(0, y), (w, y)], fill=(shade, shade, shade + 2))
+    ground = int(h * 0.78)
+    draw.ellipse([w * 0.08, ground - h * 0.03, w * 0.92, ground + h * 0.05], fill=(150, 150, 152))
+    body = [(w * 0.06, ground - h * 0.12), (w * 0.10, ground - h * 0.30), (w * 0.33, ground - h * 0.34),
+            (w * 0.45, ground - h * 0.52), (w * 0.70, ground - h * 0.53), (w * 0.84, ground - h * 0.36),
+            (w * 0.95, ground - h * 0.30), (w * 0.96, ground - h * 0.12)]
+    draw.polygon(body, fill=body_color)
+    draw.polygon([(w * 0.47, ground - h * 0.48), (w * 0.68, ground - h * 0.49), (w * 0.78, ground - h * 0.36),
+                  (w * 0.40, ground - h * 0.35)], fill=(40, 48, 60))
+    for cx in (w * 0.24, w * 0.79):
+        r = h * 0.13
+        draw.ellipse([cx - r, ground - r * 1.1, cx + r, ground + r * 0.9], fill=(25, 25, 25))
+        draw.ellipse([cx - r * 0.6, ground - r * 0.7, cx + r * 0.6, ground + r * 0.5], fill=(170, 172, 178))
+    # Sensor noise so the JPEG has photo-like entropy
+    noise = Image.frombytes("L", size, rnd.randbytes(w * h)).convert("RGB")
+    img = Image.blend(img, noise, 0.04 + rnd.random() * 0.02).filter(ImageFilter.SMOOTH)
+    img.save(path, "JPEG", quality=88)
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(text)
+
+
+def build(out_dir):
+    rnd = random.Random(2024)
+    pages = os.path.join(out_dir, "pages")
+    manifest = {'homepage': "index.html", 'make_pages': [], 'model_pages': [], 'spec_pages': [],
+                'images': [], 'jobs': []}
+
+    write(os.path.join(pages, "index.html"), homepage(rnd))
+    for make, model, years, bodies in CARS:
+        make_rel = f"make/{slug(make)}.html"
+        model_rel = f"model/{slug(make)}/{slug(model)}.html"
+        write(os.path.join(pages, make_rel), make_page(rnd, make, model, years))
+        write(os.path.join(pages, model_rel), model_page(random.Random(make), make, model, years, bodies))
+        manifest['make_pages'].append(make_rel)
+        manifest['model_pages'].append(model_rel)
+
+        # The spec page behind every submodel table on the model page
+        for href in _spec_links(os.path.join(pages, model_rel)):
+            body = href.split('/')[-2]
+            year = href.split('/')[-1].split('.')[0]
+            write(os.path.join(pages, href), spec_page(random.Random(href), make, model, body, year))
+            manifest['spec_pages'].append(href)
+        manifest['jobs'].append({'make': make, 'model': model})
+
+    images = os.path.join(out_dir, "images")
+    os.makedirs(images, exist_ok=True)
+    for name, size, color, seed in [("coupe_side.jpg", (1600, 900), (180, 20, 30), 1),
+                                    ("sedan_side.jpg", (1280, 720), (30, 60, 140), 2)]:
+        car_image(os.path.join(images, name), size, color, seed)
+        manifest['images'].append(name)
+
+    with open(os.path.join(out_dir, "manifest.json"), 'w', encoding='utf-8', newline='\n') as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return manifest
+
+
+def _spec_links(model_page_path):
+    with open(model_page_path, encoding='utf-8') as f:
+        html = f.read()
+    links = []
+    for part in html.split('<a href="/')[1:]:
+        href = part.split('"')[0]
+        if href.startswith('make/'):
+            links.append(href)
+    return links
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    manifest = build(args.out)
+    print(f"Wrote {len(manifest['make_pages']) + len(manifest['model_pages']) + len(manifest['spec_pages']) + 1} "
+          f"pages and {len(manifest['images'])} images to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
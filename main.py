@@ -1,109 +1,274 @@
 import argparse
+import atexit
+import shutil
 import sys
 import os
-from src.scraper_robust import CarScraper
-from src.poster import PosterGenerator
-from src.mock_data import MOCK_CAR_DATA, get_country_for_make
+import tempfile
+import time
+from src import metrics
+
+# Heavy dependencies (requests, bs4, DrissionPage, Pillow, rembg) are imported by the
+# stage that uses them, so --help and --mock never load the scraper stack
+STARTED = time.perf_counter()
+HEAVY_MODULES = ('requests', 'bs4', 'lxml', 'selectolax', 'httpx', 'DrissionPage', 'PIL', 'rembg', 'onnxruntime')
+startup_timing = False
+
+def startup_mark(label):
+    """--startup-time: milliseconds since main.py started, and which heavy modules are loaded by then."""
+    if startup_timing:
+        loaded = ", ".join(m for m in HEAVY_MODULES if m in sys.modules) or "none"
+        print(f"[STARTUP] {(time.perf_counter() - STARTED) * 1000:8.1f} ms  {label} (heavy modules: {loaded})")
+
+def new_poster_generator(args, prewarm=True):
+    from src.poster import PosterGenerator
+    poster_gen = PosterGenerator(output_dir="output", output_spec=args.output_spec)
+    if prewarm and not args.no_prewarm:
+        # Fonts, templates and the rembg model load while the scraper waits on the network
+        poster_gen.prewarm(done=lambda: startup_mark("poster generator warm"))
+    return poster_gen
+
+def report_archive(archive):
+    stats = archive.stats()
+    print(f"Fetch archive {archive.path}: {stats['transactions']} transactions, "
+          f"{stats['stored_bytes'] / 1024:.0f} KiB stored")
+
+def open_archive(args):
+    if not (args.record or args.replay):
+        return None
+    from src.fetch_archive import FetchArchive
+    if args.record:
+        archive = FetchArchive(args.record, 'record')
+        atexit.register(report_archive, archive)
+        return archive
+    return FetchArchive(args.replay, 'replay', latency=args.replay_latency)
+
+def scraper_options(args):
+    """Cache/store options shared by both scraper backends."""
+    if not args.archive:
+        return {'cache': not args.no_cache, 'index': not args.no_cache, 'spec_store': not args.no_cache}
+    # Recording/replaying must see every fetch: no page cache, catalog index or stored specs,
+    # and an image store that starts empty
+    from src.image_store import ImageStore
+    images_dir = tempfile.mkdtemp(prefix="autoposter-images-")
+    atexit.register(shutil.rmtree, images_dir, True)
+    return {'cache': False, 'index': False, 'spec_store': False, 'archive': args.archive,
+            'images': ImageStore(root=images_dir)}
+
+def new_scraper(args, **kwargs):
+    from src.scraper_robust import CarScraper
+    from src.rate_limit import FetchScheduler
+    options = scraper_options(args)
+    options.update(kwargs)
+    # One request per host for each tab, so no tab waits on a scheduler slot
+    limits = {'per_host': options['tabs']} if 'tabs' in options else {}
+    return CarScraper(cf_timeout=args.cf_timeout, scheduler=FetchScheduler(rate=args.rate, **limits), **options)
+
+def run_batch_mode(args):
+    from src.batch import (load_manifest, run_batch, run_batch_async, run_batch_staged, parse_stage_workers,
+                           default_results_path)
+    jobs = load_manifest(args.batch)
+    if not jobs:
+        print(f"Error: no jobs found in {args.batch}")
+        return
+
+    results_path = args.results or default_results_path(args.batch)
+    print(f"Batch mode: {len(jobs)} jobs, {args.workers} workers")
+
+    poster_gen = new_poster_generator(args)
+    if args.async_fetch:
+        # One pooled HTTP client on one event loop, no browser
+        from src.async_scraper import AsyncCarScraper
+        from src.rate_limit import FetchScheduler
+        scraper = AsyncCarScraper(scheduler=FetchScheduler(rate=args.rate), **scraper_options(args))
+        run_batch_async(jobs, scraper, poster_gen, workers=args.workers,
+                        concurrency=args.concurrency, results_path=results_path)
+    elif args.staged:
+        try:
+            stage_workers = parse_stage_workers(args.stage_workers, args.workers)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        scraper = new_scraper(args, tabs=stage_workers['scrape'])
+        try:
+            run_batch_staged(jobs, scraper, poster_gen, stage_workers=stage_workers,
+                             queue_size=args.queue_size, results_path=results_path)
+        finally:
+            scraper.close()
+    else:
+        # One browser session and one generator for the whole batch
+        scraper = new_scraper(args, tabs=args.workers)
+        try:
+            run_batch(jobs, scraper, poster_gen, workers=args.workers, results_path=results_path)
+        finally:
+            scraper.close()
+
+    print(f"\n[OK] Results manifest saved to: {os.path.abspath(results_path)}")
+
+def run_refresh_mode(args):
+    from src.batch import load_manifest, run_refresh
+    jobs = None
+    if args.batch:
+        jobs = load_manifest(args.batch)
+    scraper = new_scraper(args, tabs=args.workers, spec_store=True)
+    try:
+        run_refresh(scraper, jobs, workers=args.workers)
+    finally:
+        scraper.close()
+
+def run_all_submodels_mode(args):
+    from src.pipeline import scrape_all_submodels
+    # Renders run in worker processes with their own rembg sessions: nothing to prewarm here
+    poster_gen = new_poster_generator(args, prewarm=False)
+    scraper = new_scraper(args, tabs=args.workers)
+    names, failed, written = [], 0, 0
+
+    def car_data_items():
+        nonlocal failed
+        for name, data, error in scrape_all_submodels(scraper, args.make, args.model, workers=args.workers):
+            if error is not None:
+                failed += 1
+                print(f"[FAILED] {name}: {error}")
+                continue
+            names.append(name)
+            yield data
+
+    try:
+        # Each poster starts rendering as soon as its submodel's specs and image are in
+        for index, path, error in poster_gen.render_many(car_data_items()):
+            if error:
+                failed += 1
+                print(f"[FAILED] {names[index]}: {error}")
+            else:
+                written += 1
+                print(f"[OK] {names[index]}: {os.path.abspath(path)}")
+    except Exception as e:
+        print(f"Scraping failed: {e}")
+    finally:
+        scraper.close()
+    print(f"\n[OK] {written} posters written, {failed} failed")
+
+def run_crawl_mode(args):
+    from src.crawler import Crawler, CrawlBlocked
+    scraper = new_scraper(args, tabs=args.workers, spec_store=True)
+    try:
+        crawler = Crawler(scraper, fetch_images=args.crawl_images)
+        crawler.run(args.crawl, workers=args.workers)
+        print("\n[OK] Crawl finished.")
+    except CrawlBlocked as e:
+        print(f"\n[STOPPED] {e}")
+    finally:
+        scraper.close()
 
 def main():
     parser = argparse.ArgumentParser(description="Auto-Poster Generator")
     parser.add_argument("--make", type=str, help="Car Make (e.g. Audi)")
     parser.add_argument("--model", type=str, help="Car Model (optional, will use first found)")
+    parser.add_argument("--all-submodels", action="store_true",
+                        help="Render a poster for every submodel of the model (spec pages fetched with --workers threads)")
     parser.add_argument("--mock", action="store_true", help="Use mock data (skip scraping)")
     parser.add_argument("--openai-key", type=str, help="OpenAI API Key for background generation")
+    parser.add_argument("--batch", type=str, help="JSONL/CSV manifest with make/model jobs")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent jobs in batch mode")
+    parser.add_argument("--results", type=str, help="Result manifest path for batch mode")
+    parser.add_argument("--async-fetch", action="store_true", help="Batch mode: scrape with the asyncio HTTP backend (no browser)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Jobs scraping at once with --async-fetch")
+    parser.add_argument("--staged", action="store_true",
+                        help="Batch mode: overlap scraping, image download, background removal and rendering")
+    parser.add_argument("--stage-workers", type=str,
+                        help="Threads per stage with --staged, e.g. 'scrape=4,image=8,cutout=1,render=2' "
+                             "(default: --workers for scrape/image, 1 cutout, one render per CPU)")
+    parser.add_argument("--queue-size", type=int, help="Items queued between stages with --staged (default: 2x the next stage's workers)")
+    parser.add_argument("--cf-timeout", type=float, default=40.0, help="Max seconds to wait for Cloudflare clearance per page")
+    parser.add_argument("--rate", type=float, default=5.0, help="Max requests per second per host (lowered automatically on 429/503)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the on-disk page cache and catalog index")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Re-scrape stale/missing spec store entries (all stale ones, or those in --batch) and exit")
+    parser.add_argument("--crawl", nargs="*", metavar="MAKE",
+                        help="Crawl every model/submodel of these makes into the spec store (no makes: resume)")
+    parser.add_argument("--crawl-images", action="store_true", help="Also download images while crawling")
+    parser.add_argument("--serve", action="store_true", help="Run the HTTP poster service (GET /poster?make=&model=&format=)")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address for --serve")
+    parser.add_argument("--port", type=int, default=8000, help="Port for --serve")
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="DIR",
+                        help="Time every stage; writes DIR/spans.jsonl and DIR/metrics.prom (default DIR: profile)")
+    parser.add_argument("--output-spec", type=str, default="png",
+                        help="Output variants, e.g. 'png,webp:85,jpeg@540:82' (format[@width][:quality])")
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument("--record", type=str, metavar="ARCHIVE",
+                               help="Record every page/image fetch of this run to an archive file")
+    archive_group.add_argument("--replay", type=str, metavar="ARCHIVE",
+                               help="Serve every fetch from a recorded archive (no network, no browser)")
+    parser.add_argument("--replay-latency", type=str, default="0",
+                        help="Simulated delay per replayed response: seconds, or 'recorded'")
+    parser.add_argument("--no-prewarm", action="store_true",
+                        help="Don't load fonts/templates/rembg in the background while scraping")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="Print elapsed time and loaded heavy modules at each startup milestone")
 
     args = parser.parse_args()
+    global startup_timing
+    startup_timing = args.startup_time
+    startup_mark("arguments parsed")
+
+    from src.output_spec import parse_output_spec
+    try:
+        args.output_spec = parse_output_spec(args.output_spec)
+        args.archive = open_archive(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    if args.profile:
+        metrics.enable(os.path.join(args.profile, "spans.jsonl"))
+        atexit.register(metrics.finish, args.profile)
 
+    if args.crawl is not None:
+        run_crawl_mode(args)
+        return
+
+    if args.refresh:
+        run_refresh_mode(args)
+        return
+
+    if args.batch:
+        run_batch_mode(args)
+        return
+
+    if args.serve:
+        from src.server import serve
+        poster_gen = new_poster_generator(args)
+        scraper = new_scraper(args, tabs=args.workers)
+        try:
+            serve(scraper, poster_gen, host=args.host, port=args.port)
+        finally:
+            scraper.close()
+        return
+
+    if args.all_submodels and not args.mock:
+        if not args.make:
+            print("Error: --make is required for --all-submodels.")
+            return
+        run_all_submodels_mode(args)
+        return
+
+    from src.mock_data import MOCK_CAR_DATA
     if args.mock:
         print("Using Mock Data...")
         data = MOCK_CAR_DATA
+        poster_gen = new_poster_generator(args, prewarm=False)
     else:
         if not args.make:
             print("Error: --make is required unless --mock is used.")
             return
 
+        from src.pipeline import scrape_car_data
+        poster_gen = new_poster_generator(args)
         print(f"Starting Scraper for {args.make}...")
-        scraper = CarScraper()
+        scraper = new_scraper(args)
+        startup_mark("scraper ready")
 
         try:
-            # 1. Search Make
-            print(f"Searching for make: {args.make}...")
-            make_url = scraper.search_make(args.make)
-            print(f"Found make URL: {make_url}")
-
-            # 2. Get Models
-            print("Fetching models...")
-            models = scraper.get_models(make_url)
-
-            if not models:
-                raise Exception("No models found for this make.")
-
-            # If user specified model, search for it
-            target_model = None
-            if args.model:
-                for m in models:
-                    if args.model.lower() in m['name'].lower():
-                        target_model = m
-                        break
-                if not target_model:
-                    print(f"Model '{args.model}' not found. Using first available: {models[0]['name']}")
-                    target_model = models[0]
-            else:
-                target_model = models[0]
-                print(f"No model specified. Using first available: {target_model['name']}")
-
-            # 3. Get Submodels (Mandatory for accurate specs/image)
-            print(f"Fetching submodels for {target_model['name']}...")
-            submodels = scraper.get_submodels(target_model['url'])
-
-            if not submodels:
-                 # Fallback to model page if no submodels found (unlikely)
-                 target_submodel = target_model
-                 target_submodel['navigation_url'] = target_model['url']
-            else:
-                 # Prefer the first one (usually the base/launch model)
-                 target_submodel = submodels[0]
-                 print(f"Using submodel: {target_submodel['name']}")
-
-            # 4. Get Specs from the specific car page
-            print(f"Fetching detailed specs for {target_submodel['name']}...")
-            specs = scraper.get_specs(target_submodel['navigation_url'])
-
-            # 5. Download car image
-            image_path = None
-            if specs.get('image_url'):
-                print(f"Downloading car image...")
-                os.makedirs('assets', exist_ok=True)
-                image_path = f"assets/{args.make.lower().replace(' ', '_')}.jpg"
-                scraper.download_image(specs['image_url'], image_path)
-
-            # 5. Build data structure for poster
-            import re
-            raw_model_name = target_model.get('name', '')
-
-            # Extract year range (e.g. 2016-2023) if present in the raw name
-            year_match = re.search(r'(\d{4}\s*-\s*\d{4})', raw_model_name)
-            year_display = year_match.group(1) if year_match else specs.get('year', 'N/A')
-
-            # Clean the model name for the header
-            clean_model = re.sub(r'\s*\(?\d{4}-\d{4}\)?', '', raw_model_name).strip()
-
-            data = {
-                'make': args.make,
-                'model': clean_model,
-                'year': year_display,
-                'specs': {
-                    'engine': specs.get('engine', '-'),
-                    'power': specs.get('power', '-'),
-                    'torque': specs.get('torque', '-'),
-                    'weight': specs.get('weight', '-'),
-                    '0-100': specs.get('0-100', '-'),
-                    'top_speed': specs.get('top_speed', '-')
-                },
-                'country_code': get_country_for_make(args.make),
-                'image_path': image_path
-            }
-
+            data = scrape_car_data(scraper, args.make, args.model)
             print("Scraping completed successfully!")
 
         except Exception as e:
@@ -114,9 +279,10 @@ def main():
             scraper.close()
 
     # Generate Poster
+    startup_mark("car data ready")
     print("Generating Poster...")
-    poster_gen = PosterGenerator(output_dir="output")
     output_path = poster_gen.create_poster(data)
+    startup_mark("poster written")
 
     # Notify
     print(f"\n[OK] Done! Result saved to: {os.path.abspath(output_path)}")
@@ -0,0 +1,257 @@
+"""
+asyncio fetch backend for the requests-mode scraper.
+
+AsyncCarScraper shares the parsing, page cache and catalog index of
+CarScraper but fetches over one pooled httpx.AsyncClient (keep-alive,
+HTTP/2 when the h2 package is installed) with a per-host concurrency limit,
+so a single thread can keep dozens of requests in flight. Page cache,
+catalog index, spec/image store access and HTML parsing run in worker
+threads (asyncio.to_thread) so they never stall the fetches in flight.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from urllib.parse import urljoin, urlparse
+
+from src import metrics
+from src.cloudflare import is_challenge_response
+from src.fetch_archive import CONDITIONAL_HEADERS
+from src.image_store import CHUNK_SIZE, ImageStore
+from src.rate_limit import FetchError, Retry, RETRY_STATUSES
+from src.scraper_robust import CarScraper
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    import h2  # noqa: F401
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+
+class ArchiveAsyncTransport(httpx.AsyncBaseTransport if HAS_HTTPX else object):
+    """httpx counterpart of fetch_archive.ArchiveAdapter, wrapping the real transport when recording."""
+
+    def __init__(self, archive, transport=None):
+        self.archive = archive
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        if self.archive.replaying:
+            status, headers, body, delay = self.archive.replay(str(request.url), request.headers)
+            if delay:
+                await asyncio.sleep(delay)
+            return httpx.Response(status, headers=headers, content=body, request=request)
+
+        for name in CONDITIONAL_HEADERS:
+            if name in request.headers:
+                del request.headers[name]
+        t0 = time.perf_counter()
+        resp = await self.transport.handle_async_request(request)
+        try:
+            body = await resp.aread()
+        finally:
+            await resp.aclose()
+        elapsed = time.perf_counter() - t0
+        if request.method == 'GET':
+            self.archive.record(str(request.url), resp.status_code, resp.headers, body, elapsed)
+        # The body is already decoded: don't let the client decode it again
+        headers = [(k, v) for k, v in resp.headers.items() if k.lower() not in ('content-encoding', 'content-length')]
+        return httpx.Response(resp.status_code, headers=headers, content=body, request=request,
+                              extensions=resp.extensions)
+
+    async def aclose(self):
+        if self.transport is not None:
+            await self.transport.aclose()
+
+
+class AsyncCarScraper(CarScraper):
+    """Async counterparts of search_make, get_models, get_submodels, get_specs and fetch_image."""
+
+    def __init__(self, cache=True, index=True, max_connections=64, per_host=16, spec_store=True,
+                 scheduler=None, archive=None, images=None):
+        if not HAS_HTTPX:
+            raise ImportError("AsyncCarScraper needs httpx (pip install httpx[http2])")
+        super().__init__(use_drission=False, cache=cache, index=index, spec_store=spec_store,
+                         scheduler=scheduler, archive=archive, images=images)
+        self.per_host = per_host
+        self._host_limits = {}
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        transport = None
+        if archive:
+            real = None if archive.replaying else httpx.AsyncHTTPTransport(http2=HAS_H2, limits=limits)
+            transport = ArchiveAsyncTransport(archive, real)
+        self.client = httpx.AsyncClient(
+            http2=HAS_H2,
+            limits=limits,
+            transport=transport,
+            headers=dict(self.session.headers),
+            cookies={c.name: c.value for c in self.session.cookies},
+            timeout=15,
+            follow_redirects=True,
+        )
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc
+        sem = self._host_limits.get(host)
+        if sem is None:
+            sem = self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    async def _get_html_async(self, url):
+        entry, html = await asyncio.to_thread(self._cached_html, url)
+        if html is not None:
+            return html
+
+        print(f"Navigating to {url}...")
+        headers = entry.validators() if entry else {}
+
+        async def attempt():
+            async with self._host_limit(url):
+                try:
+                    resp = await self.client.get(url, headers=headers)
+                except httpx.HTTPError as e:
+                    raise Retry(type(e).__name__)
+            if resp.status_code in RETRY_STATUSES:
+                raise Retry(f"status {resp.status_code}", resp.status_code, resp.headers.get('Retry-After'))
+            if is_challenge_response(resp.status_code, resp.headers, resp.text):
+                raise Retry(f"Cloudflare challenge (status {resp.status_code})", resp.status_code,
+                            resp.headers.get('Retry-After'), throttle=True)
+            return resp
+
+        try:
+            with metrics.span("fetch.page"):
+                resp = await self.scheduler.fetch_async(url, attempt)
+        except FetchError as e:
+            return self._stale_or_raise(entry, e)
+        return await asyncio.to_thread(self._handle_response, url, entry, resp.status_code, resp.text, resp.headers)
+
+    @metrics.timed("scrape.search")
+    async def search_make(self, make_name):
+        make_url = self._make_from_index(make_name)
+        if make_url:
+            return make_url
+
+        print(f"Searching for {make_name}...")
+        html = await self._get_html_async(self.BASE_URL)
+        make_url = await asyncio.to_thread(self._match_links, html, make_name, True)
+        if make_url:
+            return make_url
+
+        html = await self._get_html_async(urljoin(self.BASE_URL, "browse.php"))
+        make_url = await asyncio.to_thread(self._match_links, html, make_name, False)
+        if make_url:
+            return make_url
+
+        self._make_not_found(make_name, html)
+
+    def _match_links(self, html, make_name, exact):
+        return self._match_make(self._absolute_links(html), make_name, exact)
+
+    @metrics.timed("scrape.models")
+    async def get_models(self, make_url, make_name=None):
+        if self.index:
+            models = await asyncio.to_thread(self.index.get_models, make_url)
+            if models:
+                return models
+
+        html = await self._get_html_async(make_url)
+        return await asyncio.to_thread(self._models_from_html, make_url, html)
+
+    def _models_from_html(self, make_url, html):
+        models = self._parse_models(html)
+        self._remember_models(make_url, models, html)
+        return models
+
+    @metrics.timed("scrape.submodels")
+    async def get_submodels(self, model_url):
+        if self.index:
+            submodels = await asyncio.to_thread(self.index.get_submodels, model_url)
+            if submodels:
+                return submodels
+
+        html = await self._get_html_async(model_url)
+        return await asyncio.to_thread(self._submodels_from_html, model_url, html)
+
+    def _submodels_from_html(self, model_url, html):
+        submodels = self._parse_submodels(html)
+        if submodels and self.index:
+            self.index.set_submodels(model_url, submodels)
+        return submodels
+
+    @metrics.timed("scrape.specs")
+    async def get_specs(self, config_url):
+        html = await self._get_html_async(config_url)
+        return await asyncio.to_thread(self._parse_specs, html, config_url)
+
+    @metrics.timed("scrape.image")
+    async def fetch_image(self, url):
+        """Async CarScraper.fetch_image: conditional GET through the image store."""
+        print(f"Fetching image {url}...")
+        if not url: return None
+
+        entry = await asyncio.to_thread(self.images.lookup, url)
+        if entry and entry['fresh']:
+            print("Image already in store.")
+            return entry['path']
+
+        headers = dict(self.IMAGE_HEADERS)
+        headers.update(self.images.validators(entry))
+        headers.pop('User-Agent', None)  # keep the client's UA
+
+        async def attempt():
+            tmp = None
+            try:
+                async with self._host_limit(url):
+                    async with self.client.stream('GET', url, headers=headers, timeout=20) as resp:
+                        if resp.status_code == 304 and entry:
+                            print("Image not modified, using stored copy.")
+                            await asyncio.to_thread(self.images.mark_checked, url)
+                            return entry['path']
+                        if resp.status_code in RETRY_STATUSES:
+                            raise Retry(f"status {resp.status_code}", resp.status_code,
+                                        resp.headers.get('Retry-After'))
+                        if resp.status_code != 200:
+                            print(f"Download failed (status {resp.status_code})")
+                            return None
+                        h = hashlib.sha256()
+                        tmp, f = self.images.temp_file()
+                        with f:
+                            async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                                h.update(chunk)
+                                f.write(chunk)
+                path = await asyncio.to_thread(
+                    self.images.ingest, url, tmp, h.hexdigest(), resp.headers.get('Content-Type'),
+                    resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+                tmp = None  # moved into the store
+            except httpx.HTTPError as e:
+                raise Retry(type(e).__name__)
+            finally:
+                # A failed or cancelled download never leaves its partial file behind
+                if tmp and os.path.exists(tmp):
+                    os.remove(tmp)
+            print("Download success via httpx.")
+            return path
+
+        try:
+            return await self.scheduler.fetch_async(url, attempt)
+        except Exception as e:
+            print(f"Async download exception: {e}")
+            return None
+
+    async def download_image(self, url, path):
+        print(f"Downloading {url} to {path}...")
+        stored = await self.fetch_image(url)
+        if not stored:
+            return False
+        ImageStore.copy_to(stored, path)
+        return True
+
+    async def aclose(self):
+        await self.client.aclose()
+        self.close()
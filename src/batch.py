@@ -0,0 +1,274 @@
+import asyncio
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.pipeline import attach_image, refresh_car, scrape_car_data, scrape_car_data_async
+from src.stages import Stage, StagedPipeline
+
+# Threads per stage of run_batch_staged; "workers" means the batch's --workers
+DEFAULT_STAGE_WORKERS = {'scrape': 'workers', 'image': 'workers', 'cutout': 1, 'render': os.cpu_count() or 1}
+
+
+def load_manifest(path):
+    """Reads batch jobs from a JSONL or CSV manifest (columns: make, model)."""
+    jobs = []
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                jobs.append({k.strip().lower(): (v or '').strip() for k, v in row.items() if k})
+    else:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                jobs.append(json.loads(line))
+
+    valid = []
+    for i, job in enumerate(jobs):
+        if not job.get('make'):
+            print(f"[WARN] Manifest entry {i + 1} has no 'make', skipping.")
+            continue
+        valid.append(job)
+    return valid
+
+
+def default_results_path(manifest_path):
+    base, _ = os.path.splitext(manifest_path)
+    return f"{base}.results.jsonl"
+
+
+def new_result(index, job):
+    return {'index': index, 'make': job['make'], 'model': job.get('model') or None,
+            'status': 'ok', 'output_path': None, 'error': None, 'timings': {}}
+
+
+class ResultLog:
+    """Collects job results and appends each one to the JSONL results manifest."""
+
+    def __init__(self, total, results_path=None):
+        self.total = total
+        self.results = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._out = open(results_path, 'w', encoding='utf-8') if results_path else None
+
+    def add(self, result):
+        with self._lock:
+            self.results.append(result)
+            status = "OK" if result['status'] == 'ok' else f"FAILED ({result['error']})"
+            print(f"[{len(self.results)}/{self.total}] {result['make']} {result['model'] or ''}: {status}")
+            if self._out:
+                self._out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                self._out.flush()
+
+    def finish(self, workers):
+        if self._out:
+            self._out.close()
+        elapsed = time.perf_counter() - self.started
+        ok = sum(1 for r in self.results if r['status'] == 'ok')
+        print(f"Batch finished: {ok}/{self.total} posters in {elapsed:.1f}s ({workers} workers)")
+        return sorted(self.results, key=lambda r: r['index'])
+
+
+def run_batch(jobs, scraper, poster_gen, workers=4, results_path=None):
+    """
+    Renders every job with one shared scraper and generator.
+
+    Jobs run on a thread pool of `workers` threads. One JSON line per job is
+    appended to results_path as soon as the job finishes.
+    """
+    log = ResultLog(len(jobs), results_path)
+
+    def run_job(index, job):
+        result = new_result(index, job)
+        started = time.perf_counter()
+        try:
+            t0 = time.perf_counter()
+            data = scrape_car_data(scraper, result['make'], result['model'])
+            result['timings']['scrape'] = round(time.perf_counter() - t0, 3)
+
+            t0 = time.perf_counter()
+            output_path = poster_gen.create_poster(data)
+            result['timings']['render'] = round(time.perf_counter() - t0, 3)
+            result['output_path'] = os.path.abspath(output_path)
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = str(e)
+        result['timings']['total'] = round(time.perf_counter() - started, 3)
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [pool.submit(run_job, i, job) for i, job in enumerate(jobs)]
+            for fut in as_completed(futures):
+                log.add(fut.result())
+    finally:
+        results = log.finish(workers)
+    return results
+
+
+def parse_stage_workers(spec, workers):
+    """"scrape=4,render=2" -> threads per stage, defaults from DEFAULT_STAGE_WORKERS."""
+    counts = {name: workers if n == 'workers' else n for name, n in DEFAULT_STAGE_WORKERS.items()}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        name, _, value = item.partition('=')
+        name = name.strip().lower()
+        if name not in counts or not value.strip().isdigit() or int(value) < 1:
+            raise ValueError(f"Invalid stage workers '{item.strip()}' (expected e.g. scrape=4,image=4,cutout=1,render=2)")
+        counts[name] = int(value)
+    return counts
+
+
+def run_batch_staged(jobs, scraper, poster_gen, stage_workers=None, queue_size=None, results_path=None):
+    """
+    run_batch with the stages overlapped instead of run back to back per job:
+    scrape -> image download -> background removal -> render/encode, each
+    on its own threads (stage_workers, see parse_stage_workers) with bounded
+    queues of queue_size items in between. Cut-outs are handed to the render
+    stage through the generator's cut-out cache.
+    """
+    counts = stage_workers or parse_stage_workers(None, 4)
+    log = ResultLog(len(jobs), results_path)
+
+    def timed(stage, fn):
+        def run(result):
+            t0 = time.perf_counter()
+            try:
+                fn(result)
+            finally:
+                result['timings'][stage] = round(time.perf_counter() - t0, 3)
+            return result
+        return run
+
+    def scrape(result):
+        result['data'] = scrape_car_data(scraper, result['make'], result['model'], fetch_image=False)
+
+    def image(result):
+        attach_image(scraper, result['data'])
+
+    def cutout(result):
+        image_path = result['data'].get('image_path')
+        if image_path and os.path.exists(image_path):
+            try:
+                poster_gen.cutouts.get(image_path)
+            except Exception as e:
+                # The render stage falls back to the original background
+                print(f"[WARN] Background removal failed for {result['make']}: {e}")
+
+    def render(result):
+        result['output_path'] = os.path.abspath(poster_gen.create_poster(result['data']))
+
+    pipeline = StagedPipeline([Stage(name, timed(name, fn), counts[name], queue_size)
+                               for name, fn in (('scrape', scrape), ('image', image),
+                                                ('cutout', cutout), ('render', render))])
+    started = {}
+
+    def items():
+        for index, job in enumerate(jobs):
+            result = new_result(index, job)
+            started[index] = time.perf_counter()
+            yield result
+
+    try:
+        for index, result, stage, error in pipeline.run(items()):
+            result.pop('data', None)
+            if error is not None:
+                result['status'] = 'error'
+                result['error'] = f"{stage}: {error}"
+            result['timings']['total'] = round(time.perf_counter() - started[index], 3)
+            log.add(result)
+    finally:
+        results = log.finish(", ".join(f"{name} {n}" for name, n in counts.items()))
+    pipeline.report()
+    return results
+
+
+def run_refresh(scraper, jobs=None, workers=4):
+    """
+    Re-scrapes spec store entries that are stale or missing.
+
+    With jobs (make/model dicts), only those requests are considered and
+    re-scraped through the catalog; without, every stale spec page in the
+    store (requested, crawled or from --all-submodels) is fetched again.
+    Returns (refreshed, failed).
+    """
+    store = scraper.spec_store
+    if jobs is None:
+        targets = [(f"{record['make']} {record['submodel_name'] or record['model_name']}",
+                    lambda record=record: refresh_car(scraper, record))
+                   for record in store.stale_cars()]
+    else:
+        targets = []
+        for job in jobs:
+            record = store.find(job['make'], job.get('model') or None)
+            if record is None or record['stale']:
+                targets.append((f"{job['make']} {job.get('model') or ''}",
+                                lambda job=job: scrape_car_data(scraper, job['make'], job.get('model') or None,
+                                                                refresh=True)))
+    print(f"Refresh: {len(targets)} stale or missing entries")
+
+    refreshed, failed = 0, 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(refresh): label for label, refresh in targets}
+        for fut in as_completed(futures):
+            label = futures[fut]
+            try:
+                fut.result()
+                refreshed += 1
+                print(f"[REFRESHED] {label}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAILED] {label}: {e}")
+    print(f"Refresh finished: {refreshed} updated, {failed} failed")
+    return refreshed, failed
+
+
+def run_batch_async(jobs, scraper, poster_gen, workers=4, concurrency=32, results_path=None):
+    """
+    run_batch for an AsyncCarScraper: up to `concurrency` jobs scrape at once
+    on one event loop, rendering runs on a pool of `workers` threads.
+    """
+    log = ResultLog(len(jobs), results_path)
+
+    async def run_all():
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(max(1, concurrency))
+        render_pool = ThreadPoolExecutor(max_workers=max(1, workers))
+
+        async def run_job(index, job):
+            result = new_result(index, job)
+            started = time.perf_counter()
+            try:
+                t0 = time.perf_counter()
+                async with limit:
+                    data = await scrape_car_data_async(scraper, result['make'], result['model'])
+                result['timings']['scrape'] = round(time.perf_counter() - t0, 3)
+
+                t0 = time.perf_counter()
+                output_path = await loop.run_in_executor(render_pool, poster_gen.create_poster, data)
+                result['timings']['render'] = round(time.perf_counter() - t0, 3)
+                result['output_path'] = os.path.abspath(output_path)
+            except Exception as e:
+                result['status'] = 'error'
+                result['error'] = str(e)
+            result['timings']['total'] = round(time.perf_counter() - started, 3)
+            log.add(result)
+
+        try:
+            await asyncio.gather(*(run_job(i, job) for i, job in enumerate(jobs)))
+        finally:
+            render_pool.shutdown(wait=True)
+            await scraper.aclose()
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        results = log.finish(workers)
+    return results
@@ -0,0 +1,153 @@
+import difflib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from src import metrics
+
+DAY = 24 * 3600
+
+
+def normalize_name(name):
+    """Lowercases and collapses punctuation/whitespace: 'Aston-Martin ' -> 'aston martin'."""
+    return re.sub(r'[\s\-_]+', ' ', (name or '').lower()).strip()
+
+
+def rank_by_name(items, query, cutoff=0.6):
+    """
+    Picks the best item for query: exact name, then first substring match
+    (the old linear-scan behaviour), then the closest fuzzy match.
+    """
+    q = normalize_name(query)
+    if not q:
+        return None
+    by_name = {}
+    for item in items:
+        by_name.setdefault(normalize_name(item['name']), item)
+    if q in by_name:
+        return by_name[q]
+    for key, item in by_name.items():
+        if q in key:
+            return item
+    close = difflib.get_close_matches(q, list(by_name), n=1, cutoff=cutoff)
+    return by_name[close[0]] if close else None
+
+
+class CatalogIndex:
+    """
+    Persistent make -> model -> submodel index, stored in SQLite.
+
+    Each section remembers when it was scraped and is refreshed on its own
+    once older than its TTL, so a warm index resolves a make/model to a spec
+    URL without fetching any page. Every write touches only its own row, so
+    several processes can share one index file.
+    """
+
+    DEFAULT_TTLS = {
+        'makes': 30 * DAY,
+        'models': 7 * DAY,
+        'submodels': 7 * DAY,
+    }
+
+    def __init__(self, path="cache/catalog_index.sqlite", ttls=None):
+        self.path = path
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS makes (
+                    name_key TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS models (
+                    make_url TEXT PRIMARY KEY,
+                    models TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS submodels (
+                    model_url TEXT PRIMARY KEY,
+                    submodels TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            """)
+            rows = db.execute("SELECT name_key, url, updated_at FROM makes").fetchall()
+        # Normalized make name -> URL, so find_make is one dict lookup
+        self._makes = {key: url for key, url, _ in rows}
+        self._makes_updated_at = max((updated_at for _, _, updated_at in rows), default=0)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _fresh(self, updated_at, section):
+        return (time.time() - updated_at) < self.ttls[section]
+
+    # --- Makes ---
+
+    def has_makes(self):
+        return bool(self._makes) and self._fresh(self._makes_updated_at, 'makes')
+
+    def add_makes(self, links):
+        """Records the make links (/make/ URLs) among (text, url) pairs from the homepage / browse.php."""
+        now = time.time()
+        rows = {}
+        for text, url in links:
+            key = normalize_name(text)
+            if '/make/' in url and len(key) > 1:
+                rows.setdefault(key, (key, text, url, now))
+        with self._lock:
+            with self._connect() as db:
+                db.executemany(
+                    "INSERT INTO makes (name_key, name, url, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(name_key) DO UPDATE SET "
+                    "name = excluded.name, url = excluded.url, updated_at = excluded.updated_at",
+                    list(rows.values()))
+            for key, _, url, _ in rows.values():
+                self._makes[key] = url
+            if rows:
+                self._makes_updated_at = now
+
+    def find_make(self, make_name):
+        """Returns the URL of the make named exactly make_name (after normalization), or None."""
+        return self._makes.get(normalize_name(make_name))
+
+    # --- Models / Submodels ---
+
+    def _get(self, table, key_column, key, section):
+        with self._connect() as db:
+            row = db.execute(f"SELECT {table}, updated_at FROM {table} WHERE {key_column} = ?", (key,)).fetchone()
+        hit = bool(row and self._fresh(row[1], section))
+        metrics.cache_lookup('catalog_index', hit)
+        return json.loads(row[0]) if hit else None
+
+    def _set(self, table, key_column, key, items):
+        with self._connect() as db:
+            db.execute(f"INSERT OR REPLACE INTO {table} ({key_column}, {table}, updated_at) VALUES (?, ?, ?)",
+                       (key, json.dumps(items, ensure_ascii=False), time.time()))
+
+    def get_models(self, make_url):
+        return self._get('models', 'make_url', make_url, 'models')
+
+    def set_models(self, make_url, models):
+        self._set('models', 'make_url', make_url, models)
+
+    def get_submodels(self, model_url):
+        return self._get('submodels', 'model_url', model_url, 'submodels')
+
+    def set_submodels(self, model_url, submodels):
+        self._set('submodels', 'model_url', model_url, submodels)
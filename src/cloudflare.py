@@ -0,0 +1,102 @@
+import re
+import statistics
+import threading
+import time
+
+# Lowercase fragments of the Cloudflare interstitial page title
+CHALLENGE_TITLES = ("just a moment", "один момент", "cloudflare")
+# Statuses Cloudflare serves its challenge / block pages with
+CHALLENGE_STATUSES = {403}
+_TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title', re.I | re.S)
+
+
+def challenge_marker(title):
+    """Returns the challenge fragment found in title, or None for a normal page."""
+    title = (title or '').lower()
+    for marker in CHALLENGE_TITLES:
+        if marker in title:
+            return marker
+    return None
+
+
+def is_challenge(title):
+    return challenge_marker(title) is not None
+
+
+def is_challenge_response(status, headers, html):
+    """True when an HTTP response is a Cloudflare challenge instead of the page asked for."""
+    if status in CHALLENGE_STATUSES or (headers.get('cf-mitigated') or '').lower() == 'challenge':
+        return True
+    title = _TITLE_RE.search(html or '')
+    return bool(title) and is_challenge(title.group(1))
+
+
+class ClearanceStats:
+    """Thread-safe record of how long Cloudflare challenges took to clear."""
+
+    def __init__(self, keep=1000):
+        self.keep = keep
+        self.latencies = []
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            if seconds is None:
+                self.timeouts += 1
+                return
+            self.latencies.append(seconds)
+            if len(self.latencies) > self.keep:
+                del self.latencies[0]
+
+    def summary(self):
+        with self._lock:
+            lat = list(self.latencies)
+            timeouts = self.timeouts
+        return {
+            'challenges': len(lat) + timeouts,
+            'cleared': len(lat),
+            'timeouts': timeouts,
+            'median_s': round(statistics.median(lat), 3) if lat else None,
+            'max_s': round(max(lat), 3) if lat else None,
+        }
+
+
+def wait_for_clearance(tab, timeout=40.0, poll_min=0.05, poll_max=0.5):
+    """
+    Waits until tab no longer shows a Cloudflare challenge.
+
+    Blocks on DrissionPage's title-change / document-load waits where the tab
+    supports them, and falls back to polling the title every 50 ms, backing
+    off to 500 ms. Returns the seconds it took, or None if timeout expired.
+    """
+    start = time.perf_counter()
+    deadline = start + timeout
+    interval = poll_min
+    waiter = getattr(tab, 'wait', None)
+    use_events = waiter is not None and hasattr(waiter, 'title_change')
+
+    while True:
+        marker = challenge_marker(tab.title)
+        if marker is None:
+            if use_events and hasattr(waiter, 'doc_loaded'):
+                try: waiter.doc_loaded(timeout=max(0.0, deadline - time.perf_counter()), raise_err=False)
+                except Exception: pass
+            return time.perf_counter() - start
+
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return None
+
+        if use_events:
+            try:
+                waiter.title_change(marker, exclude=True, timeout=remaining, raise_err=False)
+            except Exception:
+                # Older DrissionPage without these waits: poll instead
+                use_events = False
+            else:
+                if challenge_marker(tab.title) != marker:
+                    continue
+        # Title unchanged (or no event support): short adaptive poll
+        time.sleep(min(interval, max(0.0, deadline - time.perf_counter())))
+        interval = min(interval * 1.5, poll_max)
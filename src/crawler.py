@@ -0,0 +1,213 @@
+"""
+Resumable whole-catalog crawler.
+
+Visits every model and submodel of the given makes through CarScraper's
+get_models / get_submodels / get_specs and writes each spec page to the
+spec store. The frontier (pending URLs) and the visited set live in one
+SQLite table that is updated after every page, so an interrupted crawl
+(crash, Ctrl+C, Cloudflare block) resumes where it stopped.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from src.cloudflare import CHALLENGE_STATUSES
+from src.rate_limit import FetchError, THROTTLE_STATUSES
+
+# Node kinds, in the order the crawl expands them
+MAKE, MODEL, SPEC = 'make', 'model', 'spec'
+
+
+class CrawlBlocked(Exception):
+    """Too many consecutive blocked fetches (Cloudflare challenge, 403/429); the crawl can be resumed later."""
+
+
+def is_block(error):
+    """True for a fetch the site refused (challenge page, 403, 429), as opposed to a page that just lacks data."""
+    if not isinstance(error, FetchError):
+        return False
+    return error.status in CHALLENGE_STATUSES | THROTTLE_STATUSES or 'challenge' in error.reason.lower()
+
+
+class Crawler:
+    def __init__(self, scraper, state_path="cache/crawl_state.sqlite", fetch_images=False,
+                 max_attempts=3, max_consecutive_failures=10, report_every=25):
+        if scraper.spec_store is None:
+            raise ValueError("The crawler writes to the spec store; create the scraper with spec_store enabled")
+        self.scraper = scraper
+        self.store = scraper.spec_store
+        self.state_path = state_path
+        self.fetch_images = fetch_images
+        self.max_attempts = max_attempts
+        self.max_consecutive_failures = max_consecutive_failures
+        self.report_every = report_every
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._blocked = False
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS frontier (
+                    url TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    context TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    added_at REAL NOT NULL,
+                    done_at REAL,
+                    PRIMARY KEY (url, kind)
+                )""")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.state_path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def add(self, url, kind, **context):
+        """Queues url unless it is already known (pending, done or failed). Returns True if new."""
+        with self._connect() as db:
+            cur = db.execute(
+                "INSERT OR IGNORE INTO frontier (url, kind, context, added_at) VALUES (?, ?, ?, ?)",
+                (url, kind, json.dumps(context, ensure_ascii=False), time.time()))
+            return cur.rowcount > 0
+
+    def counts(self):
+        with self._connect() as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall())
+
+    def _claim(self):
+        """Marks the next pending node in_progress and returns it; specs first keeps the frontier small."""
+        with self._lock, self._connect() as db:
+            row = db.execute(
+                "SELECT url, kind, context FROM frontier WHERE status = 'pending' "
+                "ORDER BY CASE kind WHEN 'spec' THEN 0 WHEN 'model' THEN 1 ELSE 2 END, added_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE frontier SET status = 'in_progress' WHERE url = ? AND kind = ?", row[:2])
+        return row[0], row[1], json.loads(row[2])
+
+    def _finish(self, url, kind, error=None):
+        with self._connect() as db:
+            if error is None:
+                db.execute("UPDATE frontier SET status = 'done', error = NULL, done_at = ? "
+                           "WHERE url = ? AND kind = ?", (time.time(), url, kind))
+            else:
+                # Back to pending until max_attempts, then failed
+                db.execute("UPDATE frontier SET attempts = attempts + 1, error = ?, "
+                           "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                           "WHERE url = ? AND kind = ?", (error, self.max_attempts, url, kind))
+
+    def seed(self, makes):
+        """Resolves make names to catalog URLs and queues them."""
+        for make in makes:
+            try:
+                make_url = self.scraper.search_make(make)
+            except Exception as e:
+                print(f"[WARN] Could not resolve make '{make}': {e}")
+                continue
+            if self.add(make_url, MAKE, make=make):
+                print(f"Queued make {make}: {make_url}")
+
+    def _visit(self, url, kind, ctx):
+        """Fetches one node, queues its children. Raises on a failed fetch or a listing without links."""
+        if kind == MAKE:
+            models = self.scraper.get_models(url, ctx['make'])
+            if not models:
+                raise ValueError("no models found")
+            for m in models:
+                self.add(m['url'], MODEL, make=ctx['make'], make_url=url, model_name=m['name'])
+
+        elif kind == MODEL:
+            submodels = self.scraper.get_submodels(url)
+            targets = [(s['navigation_url'], s['name']) for s in submodels if s.get('navigation_url')]
+            if not targets:
+                # Same fallback as the single-car pipeline: the model page itself
+                targets = [(url, ctx['model_name'])]
+            for nav_url, name in targets:
+                self.add(nav_url, SPEC, make=ctx['make'], make_url=ctx['make_url'],
+                         model_name=ctx['model_name'], model_url=url, submodel_name=name)
+
+        else:
+            # Sparse pages (every value N/A) are real pages: store them as they are
+            specs = self.scraper.get_specs(url)
+            image_path = None
+            if self.fetch_images and specs.get('image_url'):
+                image_path = self.scraper.fetch_image(specs['image_url'])
+            self.store.put_car(url, ctx['make'], specs, make_url=ctx['make_url'],
+                               model_name=ctx['model_name'], model_url=ctx['model_url'],
+                               submodel_name=ctx['submodel_name'], image_path=image_path)
+
+    def _worker(self, stats):
+        while not self._blocked:
+            node = self._claim()
+            if node is None:
+                # Another worker may still be expanding a node into new children
+                if self.counts().get('in_progress', 0) == 0:
+                    return
+                time.sleep(0.2)
+                continue
+            url, kind, ctx = node
+            try:
+                self._visit(url, kind, ctx)
+            except Exception as e:
+                self._finish(url, kind, error=str(e))
+                print(f"[FAILED] {kind} {url}: {e}")
+                with self._lock:
+                    # Only refused fetches count towards a block; other failures mean the site is answering
+                    self._consecutive_failures = self._consecutive_failures + 1 if is_block(e) else 0
+                    if self._consecutive_failures >= self.max_consecutive_failures:
+                        self._blocked = True
+                continue
+
+            self._finish(url, kind)
+            with self._lock:
+                self._consecutive_failures = 0
+                stats['pages'] += 1
+                pages = stats['pages']
+            if pages % self.report_every == 0:
+                self.report(stats)
+
+    def report(self, stats):
+        elapsed = time.perf_counter() - stats['started']
+        counts = self.counts()
+        rate = stats['pages'] / elapsed * 60 if elapsed > 0 else 0.0
+        print(f"[CRAWL] {stats['pages']} pages in {elapsed:.0f}s ({rate:.1f}/min) | "
+              f"done {counts.get('done', 0)}, pending {counts.get('pending', 0)}, failed {counts.get('failed', 0)}")
+
+    def run(self, makes=(), workers=1, retry_failed=True):
+        """
+        Crawls until the frontier is empty. makes are added to the frontier
+        first; with none, a previous crawl is resumed. Raises CrawlBlocked
+        after max_consecutive_failures blocked fetches in a row.
+        """
+        with self._connect() as db:
+            # Nodes claimed by a crashed run, and (optionally) ones that gave up last time
+            db.execute("UPDATE frontier SET status = 'pending' WHERE status = 'in_progress'")
+            if retry_failed:
+                db.execute("UPDATE frontier SET status = 'pending', attempts = 0 WHERE status = 'failed'")
+        self.seed(makes)
+
+        stats = {'pages': 0, 'started': time.perf_counter()}
+        self._blocked = False
+        self._consecutive_failures = 0
+        counts = self.counts()
+        print(f"Crawl: {counts.get('pending', 0)} pending, {counts.get('done', 0)} already done")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for fut in [pool.submit(self._worker, stats) for _ in range(max(1, workers))]:
+                fut.result()
+        self.report(stats)
+        if self._blocked:
+            raise CrawlBlocked(f"{self.max_consecutive_failures} blocked fetches in a row; "
+                               f"state saved in {self.state_path}, rerun to resume")
+        return stats['pages']
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import tempfile
+import threading
+from io import BytesIO
+
+from PIL import Image
+
+from src import metrics
+
+DEFAULT_MODEL = "u2net"
+
+
+class CutoutCache:
+    """
+    Background-removed car images, cached on disk.
+
+    The autocropped RGBA cut-out is stored as a PNG keyed by the SHA-256 of
+    the source image and the rembg model name, so re-rendering a poster
+    (new layout, updated specs) never runs segmentation again. The rembg
+    session is created once, on first miss, and reused for every image.
+    """
+
+    def __init__(self, cache_dir="cache/cutouts", model_name=DEFAULT_MODEL):
+        self.model_name = model_name
+        self.cache_dir = os.path.join(cache_dir, model_name)
+        self._session = None
+        self._lock = threading.Lock()
+
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    from rembg import new_session
+                    print(f"Loading rembg model '{self.model_name}'...")
+                    self._session = new_session(self.model_name)
+        return self._session
+
+    def _path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], digest + ".png")
+
+    def get(self, image_path):
+        """Returns the autocropped cut-out of image_path as an RGBA image."""
+        with open(image_path, 'rb') as f:
+            input_data = f.read()
+        path = self._path(hashlib.sha256(input_data).hexdigest())
+
+        if os.path.exists(path):
+            try:
+                with Image.open(path) as cached:
+                    car_img = cached.convert("RGBA")
+                metrics.cache_lookup('cutout', True)
+                return car_img
+            except Exception as e:
+                print(f"[WARN] Unreadable cut-out {path}, regenerating: {e}")
+        metrics.cache_lookup('cutout', False)
+
+        from rembg import remove
+        session = self.session()
+        with metrics.span("render.rembg"):
+            output_data = remove(input_data, session=session)
+        car_img = Image.open(BytesIO(output_data)).convert("RGBA")
+
+        # Autocrop to remove transparent margins
+        bbox = car_img.getbbox()
+        if bbox:
+            car_img = car_img.crop(bbox)
+
+        self._save(car_img, path)
+        return car_img
+
+    def _save(self, img, path):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, format='PNG')
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"[WARN] Could not cache cut-out: {e}")
+            try: os.remove(tmp)
+            except OSError: pass
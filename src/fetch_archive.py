@@ -0,0 +1,187 @@
+"""
+Record/replay archive of HTTP transactions.
+
+In record mode every page and image fetched by a CarScraper (requests
+session, browser tab or httpx client) is stored with its status, headers
+and body; in replay mode the same transactions are served back from the
+archive without any network or browser, optionally after a simulated
+latency. The archive is one SQLite file; bodies are stored once per
+content hash and zlib-compressed when that makes them smaller.
+
+    python main.py --make Audi --model "TT RS" --record runs/audi.sqlite
+    python main.py --make Audi --model "TT RS" --replay runs/audi.sqlite --replay-latency recorded
+"""
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import timedelta
+from http.client import responses
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src import metrics
+from src.rate_limit import RETRY_STATUSES
+
+RECORD, REPLAY = 'record', 'replay'
+# The body is stored decoded, and credentials are never written to the archive
+DROP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive',
+                'set-cookie'}
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+
+class FetchArchive:
+    def __init__(self, path, mode=REPLAY, latency=0.0):
+        """
+        mode is 'record' or 'replay'. latency (replay only) is a fixed delay
+        in seconds per response, or 'recorded' to wait as long as the
+        original response took.
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown archive mode '{mode}' (use 'record' or 'replay')")
+        if mode == REPLAY and not os.path.exists(path):
+            raise ValueError(f"No fetch archive at {path}; record one with --record first")
+        self.path = path
+        self.mode = mode
+        try:
+            self.latency = latency if latency == 'recorded' else float(latency or 0.0)
+        except ValueError:
+            raise ValueError(f"Invalid replay latency '{latency}' (seconds or 'recorded')")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS bodies (
+                    digest TEXT PRIMARY KEY,
+                    encoding TEXT NOT NULL,
+                    data BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS transactions (
+                    url TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    elapsed REAL NOT NULL,
+                    recorded_at REAL NOT NULL
+                );
+            """)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @property
+    def replaying(self):
+        return self.mode == REPLAY
+
+    def record(self, url, status, headers, body, elapsed=0.0):
+        """Stores the response to GET url. A retryable failure never replaces a good recording."""
+        headers = {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS}
+        digest = hashlib.sha256(body).hexdigest()
+        packed = zlib.compress(body, 6)
+        encoding, data = ('zlib', packed) if len(packed) < len(body) else ('identity', body)
+        failed = ','.join(str(s) for s in sorted(RETRY_STATUSES))
+        with self._connect() as db:
+            db.execute("INSERT OR IGNORE INTO bodies (digest, encoding, data) VALUES (?, ?, ?)",
+                       (digest, encoding, data))
+            db.execute(
+                "INSERT INTO transactions (url, status, headers, digest, elapsed, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET status = excluded.status, headers = excluded.headers, "
+                "digest = excluded.digest, elapsed = excluded.elapsed, recorded_at = excluded.recorded_at "
+                f"WHERE excluded.status NOT IN ({failed}) OR transactions.status IN ({failed})",
+                (url, status, json.dumps(headers, ensure_ascii=False), digest, elapsed, time.time()))
+
+    def record_page(self, url, html, elapsed=0.0):
+        """Records HTML read from a browser tab as a plain 200 response."""
+        self.record(url, 200, {'Content-Type': 'text/html; charset=utf-8'}, html.encode('utf-8'), elapsed)
+
+    def lookup(self, url):
+        """Returns {'status', 'headers', 'body', 'elapsed'} recorded for url, or None."""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT t.status, t.headers, t.elapsed, b.encoding, b.data "
+                "FROM transactions t JOIN bodies b ON b.digest = t.digest WHERE t.url = ?",
+                (url,)).fetchone()
+        metrics.cache_lookup('archive', row is not None)
+        if row is None:
+            return None
+        status, headers, elapsed, encoding, data = row
+        body = zlib.decompress(data) if encoding == 'zlib' else data
+        return {'status': status, 'headers': json.loads(headers), 'body': body, 'elapsed': elapsed}
+
+    def replay(self, url, request_headers=None):
+        """
+        (status, headers, body, delay) to serve for url: the recording (304 if the
+        request's ETag matches it) or a 404 when url was never recorded.
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            print(f"[REPLAY] Not in archive: {url}")
+            return 404, {'Content-Type': 'text/plain'}, b"not in archive", 0.0
+        delay = entry['elapsed'] if self.latency == 'recorded' else self.latency
+        etag = CaseInsensitiveDict(entry['headers']).get('ETag')
+        if etag and request_headers and request_headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b"", delay
+        return entry['status'], entry['headers'], entry['body'], delay
+
+    def stats(self):
+        with self._connect() as db:
+            count, = db.execute("SELECT COUNT(*) FROM transactions").fetchone()
+            stored, = db.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM bodies").fetchone()
+        return {'transactions': count, 'stored_bytes': stored}
+
+    def adapter(self):
+        """A requests transport adapter recording to / replaying from this archive."""
+        return ArchiveAdapter(self)
+
+
+class ArchiveAdapter(HTTPAdapter):
+    """Mounted on a requests.Session: records real responses, or answers from the archive."""
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.archive.replaying:
+            status, headers, body, delay = self.archive.replay(request.url, request.headers)
+            if delay:
+                time.sleep(delay)
+            return self._replayed_response(request, status, headers, body, delay)
+
+        if request.method == 'GET':
+            # Record full bodies, not 304s that only make sense against this machine's caches
+            for name in CONDITIONAL_HEADERS:
+                request.headers.pop(name, None)
+        resp = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        if request.method == 'GET':
+            # Reading the body here leaves it in resp.content for streaming callers too
+            self.archive.record(request.url, resp.status_code, resp.headers, resp.content,
+                                resp.elapsed.total_seconds())
+        return resp
+
+    def _replayed_response(self, request, status, headers, body, delay):
+        resp = requests.Response()
+        resp.status_code = status
+        resp.reason = responses.get(status, '')
+        resp.headers = CaseInsensitiveDict(headers)
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.raw = io.BytesIO(body)
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        resp.elapsed = timedelta(seconds=delay)
+        return resp
@@ -0,0 +1,121 @@
+"""
+HTML parsing backends for CarScraper.
+
+BACKEND selects the parser:
+    'auto'        - selectolax for link lists, else lxml, when installed
+    'lxml'        - BeautifulSoup with the C-backed lxml builder for link lists
+    'selectolax'  - selectolax for link lists
+    'html.parser' - pure-Python reference parser (the original behaviour)
+
+Override with the AUTOPOSTER_HTML_PARSER environment variable. Callers pass
+a SoupStrainer (see STRAIN_*) so only the elements they read are built.
+
+iter_links returns exactly what the html.parser reference does. The HTML5
+parsers (lxml, selectolax) only disagree with it on anchors that are left
+open, nested or wrap block markup, so pages with such anchors go through
+the reference parser.
+
+make_soup always uses html.parser: lxml moves block elements out of an open
+<p> (the submodel name and description cells), and guarding whole trees the
+way iter_links guards anchors costs about what lxml saves.
+"""
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    try:
+        # selectolax < 1.0 only ships the Modest backend
+        from selectolax.parser import HTMLParser
+        HAS_SELECTOLAX = True
+    except ImportError:
+        HAS_SELECTOLAX = False
+
+BACKEND = os.environ.get('AUTOPOSTER_HTML_PARSER', 'auto')
+
+# Only anchors with an href (search_make, get_models)
+STRAIN_LINKS = SoupStrainer('a', href=True)
+# Only tables and their contents (get_submodels)
+STRAIN_TABLES = SoupStrainer('table')
+
+
+# Tags whose presence inside an <a> every backend handles the same way
+INLINE_TAGS = frozenset({
+    'abbr', 'b', 'bdi', 'bdo', 'big', 'br', 'cite', 'code', 'data', 'dfn', 'em', 'font', 'i', 'img',
+    'kbd', 'mark', 'picture', 'q', 's', 'samp', 'small', 'source', 'span', 'strong', 'sub', 'sup',
+    'time', 'u', 'var', 'wbr',
+})
+# Comments and script/style bodies are skipped whole, as html.parser does
+_SKIP = r'<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>'
+_ANCHOR_RE = re.compile(_SKIP + r'|<(/?)a(?=[\s/>])([^>]*)>', re.S | re.I)
+_TAG_RE = re.compile(_SKIP + r'|</?([a-zA-Z][\w:-]*)', re.S | re.I)
+_HREF_RE = re.compile(r'\shref\s*=', re.I)
+
+
+def _simple_anchors(html):
+    """
+    Number of <a href> tags in html if every anchor is closed, not nested and
+    holds only INLINE_TAGS (the HTML5 parsers then build the same anchors as
+    html.parser), otherwise None.
+    """
+    count = 0
+    open_at = None
+    for m in _ANCHOR_RE.finditer(html):
+        if m.group(1):
+            continue
+        if m.group(2):
+            if open_at is None:
+                return None
+            for tag in _TAG_RE.finditer(html, open_at, m.start()):
+                if tag.group(2) and tag.group(2).lower() not in INLINE_TAGS:
+                    return None
+            open_at = None
+        else:
+            attrs = m.group(3)
+            if open_at is not None or attrs.rstrip().endswith('/'):
+                return None
+            open_at = m.end()
+            if _HREF_RE.search(attrs):
+                count += 1
+    return None if open_at is not None else count
+
+
+def make_soup(html, parse_only=None):
+    """Builds a BeautifulSoup tree, optionally restricted to parse_only."""
+    return BeautifulSoup(html, 'html.parser', parse_only=parse_only)
+
+
+def iter_links(html):
+    """Returns [(text, href)] for every <a href> in document order."""
+    if BACKEND != 'html.parser':
+        expected = _simple_anchors(html)
+        if expected is not None:
+            links = _fast_links(html)
+            if links is not None and len(links) == expected:
+                return links
+
+    soup = BeautifulSoup(html, 'html.parser', parse_only=STRAIN_LINKS)
+    return [(a.get_text(strip=True), a['href']) for a in soup.find_all('a', href=True)]
+
+
+def _fast_links(html):
+    if BACKEND in ('auto', 'selectolax') and HAS_SELECTOLAX:
+        tree = HTMLParser(html)
+        # html.parser leaves script/style text out of get_text()
+        tree.strip_tags(['script', 'style'])
+        return [(node.text(deep=True, separator='', strip=True), node.attributes.get('href') or '')
+                for node in tree.css('a[href]')]
+    if HAS_LXML:
+        soup = BeautifulSoup(html, 'lxml', parse_only=STRAIN_LINKS)
+        return [(a.get_text(strip=True), a['href']) for a in soup.find_all('a', href=True)]
+    return None
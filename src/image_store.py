@@ -0,0 +1,175 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from src import metrics
+from src.rate_limit import Retry, RETRY_STATUSES
+
+DAY = 24 * 3600
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPE_EXT = {
+    'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp',
+    'image/gif': '.gif', 'image/avif': '.avif',
+}
+
+
+class ImageStore:
+    """
+    Downloaded images, stored once per content hash.
+
+    A SQLite index maps each source URL to its object file plus ETag /
+    Last-Modified, so a repeated fetch is either skipped (checked within
+    revalidate_after) or a conditional GET answered with 304. Object files are
+    immutable and written atomically, so concurrent jobs never clobber each
+    other's images.
+    """
+
+    def __init__(self, root="cache/images", revalidate_after=7 * DAY):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.revalidate_after = revalidate_after
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.db_path = os.path.join(root, "index.sqlite")
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS images (
+                    url TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    ext TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    checked_at REAL NOT NULL
+                )""")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _object_path(self, digest, ext):
+        return os.path.join(self.objects_dir, digest[:2], digest + ext)
+
+    def lookup(self, url):
+        """Returns the stored entry for url as a dict, or None."""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT digest, ext, etag, last_modified, checked_at FROM images WHERE url = ?",
+                (url,)).fetchone()
+        if not row:
+            metrics.cache_lookup('image', False)
+            return None
+        digest, ext, etag, last_modified, checked_at = row
+        path = self._object_path(digest, ext)
+        if not os.path.exists(path):
+            metrics.cache_lookup('image', False)
+            return None
+        fresh = (time.time() - checked_at) < self.revalidate_after
+        metrics.cache_lookup('image', fresh)
+        return {'path': path, 'digest': digest, 'etag': etag, 'last_modified': last_modified,
+                'fresh': fresh}
+
+    @staticmethod
+    def validators(entry):
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def mark_checked(self, url):
+        with self._connect() as db:
+            db.execute("UPDATE images SET checked_at = ? WHERE url = ?", (time.time(), url))
+
+    def temp_file(self, suffix='.part'):
+        """Opens a temp file inside the store (same filesystem, so ingest can rename it)."""
+        fd, tmp = tempfile.mkstemp(dir=self.objects_dir, suffix=suffix)
+        return tmp, os.fdopen(fd, 'wb')
+
+    def ingest(self, url, tmp_path, digest=None, content_type=None, etag=None, last_modified=None):
+        """Moves a downloaded file into the store and records it for url. Returns the object path."""
+        if digest is None:
+            h = hashlib.sha256()
+            with open(tmp_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    h.update(chunk)
+            digest = h.hexdigest()
+
+        ext = CONTENT_TYPE_EXT.get((content_type or '').split(';')[0].strip())
+        if not ext:
+            ext = os.path.splitext(urlparse(url).path)[1].lower() or '.jpg'
+        path = self._object_path(digest, ext)
+        if os.path.exists(path):
+            # Same bytes already stored (another URL or a concurrent job)
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO images (url, digest, ext, etag, last_modified, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, digest, ext, etag, last_modified, time.time()))
+        return path
+
+    def fetch(self, session, url, entry=None, headers=None, timeout=20):
+        """
+        Returns a local path for url using a requests-style session, or None.
+
+        entry is the caller's lookup(url). Skips the network while it is
+        fresh, otherwise sends a conditional GET and streams a changed body
+        to disk in chunks. Raises Retry on 429/5xx so a FetchScheduler can
+        try again.
+        """
+        if entry and entry['fresh']:
+            print("Image already in store.")
+            return entry['path']
+
+        req_headers = dict(headers or {})
+        req_headers.update(self.validators(entry))
+        with session.get(url, headers=req_headers, timeout=timeout, stream=True) as resp:
+            if resp.status_code == 304 and entry:
+                print("Image not modified, using stored copy.")
+                self.mark_checked(url)
+                return entry['path']
+            if resp.status_code in RETRY_STATUSES:
+                raise Retry(f"status {resp.status_code}", resp.status_code, resp.headers.get('Retry-After'))
+            if resp.status_code != 200:
+                print(f"Image download failed (status {resp.status_code})")
+                return None
+
+            h = hashlib.sha256()
+            tmp, f = self.temp_file()
+            try:
+                with f:
+                    for chunk in resp.iter_content(CHUNK_SIZE):
+                        h.update(chunk)
+                        f.write(chunk)
+            except Exception:
+                os.remove(tmp)
+                raise
+            return self.ingest(url, tmp, h.hexdigest(), resp.headers.get('Content-Type'),
+                               resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+
+    @staticmethod
+    def copy_to(src, dest):
+        """Materializes a stored image at dest (atomic replace)."""
+        directory = os.path.dirname(dest) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.part')
+        os.close(fd)
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+        return dest
@@ -0,0 +1,231 @@
+"""
+Lightweight timing spans and counters.
+
+Disabled by default: span() then returns a shared no-op context manager and
+count() returns immediately, so instrumented code costs one global check.
+enable() turns recording on (main.py --profile); finish() prints a summary
+and writes a Prometheus textfile next to the JSON-lines span log.
+
+    with metrics.span("render.encode", format="png"):
+        ...
+
+    @metrics.timed("scrape.specs")
+    def get_specs(self, url): ...
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+PREFIX = "autoposter"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+ENABLED = False
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum, max]
+_counters = {}    # (name, labels) -> value
+_events = None
+_events_path = None
+
+
+def enable(events_path=None):
+    """Starts recording; span events are appended to events_path as JSON lines if given."""
+    global ENABLED, _events, _events_path
+    _events_path = events_path
+    if events_path:
+        os.makedirs(os.path.dirname(events_path) or '.', exist_ok=True)
+        _events = open(events_path, 'a', encoding='utf-8')
+    ENABLED = True
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def observe(name, seconds, **labels):
+    key = (name, _labels_key(labels))
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0.0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                h[i] += 1
+        h[len(BUCKETS)] += 1
+        h[-2] += seconds
+        h[-1] = max(h[-1], seconds)
+
+
+@contextmanager
+def _span(name, labels):
+    started_at = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        observe(name, elapsed, **labels)
+        if _events is not None:
+            line = json.dumps({'span': name, 'labels': labels, 'start': round(started_at, 6),
+                               'seconds': round(elapsed, 6), 'thread': threading.current_thread().name},
+                              ensure_ascii=False)
+            with _lock:
+                _events.write(line + "\n")
+
+
+def span(name, **labels):
+    """Times the with-block as `name` (a no-op unless enabled)."""
+    if not ENABLED:
+        return _NOOP
+    return _span(name, labels)
+
+
+def timed(name):
+    """Decorator form of span() for functions and coroutine functions."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not ENABLED:
+                    return await fn(*args, **kwargs)
+                with _span(name, {}):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def drain():
+    """Returns the histograms and counters recorded so far and clears them (see merge)."""
+    global _histograms, _counters
+    with _lock:
+        stats = (_histograms, _counters)
+        _histograms, _counters = {}, {}
+    return stats
+
+
+def merge(stats):
+    """Adds stats drained in another process (e.g. a render worker) to this one's."""
+    if not ENABLED or not stats:
+        return
+    histograms, counters = stats
+    with _lock:
+        for key, h in histograms.items():
+            mine = _histograms.get(key)
+            if mine is None:
+                _histograms[key] = list(h)
+                continue
+            for i in range(len(BUCKETS) + 2):
+                mine[i] += h[i]
+            mine[-1] = max(mine[-1], h[-1])
+        for key, value in counters.items():
+            _counters[key] = _counters.get(key, 0) + value
+
+
+def cache_lookup(cache, hit):
+    """Counts a hit or miss of one of the caches (page, catalog_index, image, spec_store, cutout, archive)."""
+    if ENABLED:
+        count('cache_requests', cache=cache, result='hit' if hit else 'miss')
+
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text():
+    """Current metrics in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = [f"# HELP {PREFIX}_span_seconds Time spent per pipeline stage.",
+             f"# TYPE {PREFIX}_span_seconds histogram"]
+    for (name, labels), h in sorted(histograms.items()):
+        base = (('span', name),) + labels
+        for bound, n in zip(BUCKETS, h):
+            lines.append(f"{PREFIX}_span_seconds_bucket{_fmt_labels(base, [('le', bound)])} {n}")
+        lines.append(f"{PREFIX}_span_seconds_bucket{_fmt_labels(base, [('le', '+Inf')])} {h[len(BUCKETS)]}")
+        lines.append(f"{PREFIX}_span_seconds_sum{_fmt_labels(base)} {h[-2]:.6f}")
+        lines.append(f"{PREFIX}_span_seconds_count{_fmt_labels(base)} {h[len(BUCKETS)]}")
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+        for (cname, labels), value in sorted(counters.items()):
+            if cname == name:
+                lines.append(f"{PREFIX}_{name}_total{_fmt_labels(labels)} {value}")
+
+    # Hit ratio per cache, derived from the cache_requests counter
+    lookups = {}
+    for (name, labels), value in counters.items():
+        if name == 'cache_requests':
+            d = dict(labels)
+            hits_total = lookups.setdefault(d['cache'], [0, 0])
+            hits_total[0] += value if d['result'] == 'hit' else 0
+            hits_total[1] += value
+    if lookups:
+        lines.append(f"# TYPE {PREFIX}_cache_hit_ratio gauge")
+        for cache, (hits, total) in sorted(lookups.items()):
+            lines.append(f"{PREFIX}_cache_hit_ratio{_fmt_labels([('cache', cache)])} {hits / total:.4f}")
+    return "\n".join(lines) + "\n"
+
+
+def summary():
+    """Rows of (span, labels, count, total_s, mean_s, max_s), slowest total first."""
+    with _lock:
+        rows = [(name, dict(labels), h[len(BUCKETS)], h[-2], h[-2] / max(1, h[len(BUCKETS)]), h[-1])
+                for (name, labels), h in _histograms.items()]
+    return sorted(rows, key=lambda r: r[3], reverse=True)
+
+
+def finish(out_dir="profile"):
+    """Prints the span summary and writes <out_dir>/metrics.prom (atomically)."""
+    global _events
+    if not ENABLED:
+        return
+    if _events is not None:
+        _events.close()
+        _events = None
+
+    print("\n--- Profile ---")
+    print(f"{'span':32} {'count':>6} {'total s':>9} {'mean s':>9} {'max s':>9}")
+    for name, labels, n, total, mean, longest in summary():
+        label = name + (" " + ",".join(f"{k}={v}" for k, v in labels.items()) if labels else "")
+        print(f"{label:32} {n:>6} {total:>9.3f} {mean:>9.4f} {longest:>9.3f}")
+    with _lock:
+        cache_counts = {k: v for k, v in _counters.items() if k[0] == 'cache_requests'}
+    if cache_counts:
+        caches = sorted({dict(labels)['cache'] for _, labels in cache_counts})
+        for cache in caches:
+            hits = cache_counts.get(('cache_requests', (('cache', cache), ('result', 'hit'))), 0)
+            misses = cache_counts.get(('cache_requests', (('cache', cache), ('result', 'miss'))), 0)
+            print(f"cache {cache}: {hits} hits / {hits + misses} lookups")
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "metrics.prom")
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+    print(f"Metrics written to {path}" + (f", span log in {_events_path}" if _events_path else ""))
@@ -0,0 +1,155 @@
+"""
+Output variants for rendered posters.
+
+A spec is a list of OutputVariant (format, width, quality). From the CLI it
+is written as comma-separated items "format[@width][:quality]", e.g.
+
+    png,webp:85,jpeg@540:82,webp@270:80
+
+A variant without a width is full size; smaller widths keep the aspect ratio
+(widths must be below the full poster width). The quality of a PNG variant
+is its zlib compression level: "png" uses Pillow's default, "png:9" opts in
+to the much slower maximum compression.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image
+
+from src import metrics
+
+FORMATS = {
+    # name: (Pillow format, file extension, default quality)
+    'png': ('PNG', '.png', 6),
+    'webp': ('WEBP', '.webp', 85),
+    'jpeg': ('JPEG', '.jpg', 85),
+    'jpg': ('JPEG', '.jpg', 85),
+}
+
+CONTENT_TYPES = {'PNG': 'image/png', 'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+
+QUALITY_RANGES = {'PNG': (0, 9), 'WEBP': (1, 100), 'JPEG': (1, 100)}
+
+DEFAULT_SPEC = "png"
+# Width of rendered posters: @width variants must be smaller
+POSTER_WIDTH = 1080
+
+
+class OutputVariant:
+    def __init__(self, fmt, width=None, quality=None):
+        fmt = fmt.lower()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+        self.format, self.ext, default_quality = FORMATS[fmt]
+        self.width = width
+        self.quality = quality if quality is not None else default_quality
+        low, high = QUALITY_RANGES[self.format]
+        if not low <= self.quality <= high:
+            raise ValueError(f"{fmt} quality must be between {low} and {high}")
+        self.content_type = CONTENT_TYPES[self.format]
+        # Set by parse_output_spec when another variant would get the same file name
+        self.name_quality = False
+
+    def key(self):
+        return self.format, self.width, self.quality
+
+    def filename(self, stem, full_width):
+        if self.width and self.width < full_width:
+            stem = f"{stem}_{self.width}w"
+        if self.name_quality:
+            stem = f"{stem}_q{self.quality}"
+        return stem + self.ext
+
+    def save_options(self):
+        """Encoder settings: PNG at its compression level, optimized JPEG/WebP at the given quality."""
+        if self.format == 'PNG':
+            return {'compress_level': self.quality, 'optimize': self.quality == 9}
+        if self.format == 'JPEG':
+            return {'quality': self.quality, 'optimize': True, 'progressive': True}
+        return {'quality': self.quality, 'method': 4}
+
+    def __repr__(self):
+        size = f"@{self.width}" if self.width else ""
+        quality = f":{self.quality}" if self.quality is not None else ""
+        return f"{self.format.lower()}{size}{quality}"
+
+
+def parse_output_spec(spec, full_width=POSTER_WIDTH):
+    """
+    Parses "png,webp:85,jpeg@540:82" (or checks a list of OutputVariant).
+    Identical variants ("jpeg,jpg") are written once; variants that differ
+    only in quality get it in their file name ("webp:85,webp:50").
+    """
+    if not spec:
+        spec = DEFAULT_SPEC
+    if isinstance(spec, str):
+        parsed = []
+        for item in spec.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            fmt, _, quality = item.partition(':')
+            fmt, _, width = fmt.partition('@')
+            try:
+                parsed.append(OutputVariant(fmt.strip(), int(width) if width else None,
+                                            int(quality) if quality else None))
+            except ValueError as e:
+                raise ValueError(f"Bad output spec item '{item}': {e}")
+    else:
+        parsed = list(spec)
+    if not parsed:
+        raise ValueError(f"Empty output spec: '{spec}'")
+
+    variants = {}
+    for variant in parsed:
+        if variant.width is not None and not 0 < variant.width < full_width:
+            raise ValueError(f"Bad output spec item '{variant!r}': width must be below the full "
+                             f"poster width ({full_width}px); leave out @width for full size")
+        variants.setdefault(variant.key(), variant)
+    variants = list(variants.values())
+    for variant in variants:
+        variant.name_quality = any(other is not variant and other.ext == variant.ext
+                                   and other.width == variant.width for other in variants)
+    return variants
+
+
+def build_sizes(img, widths):
+    """
+    Returns {width: image} for every requested width, never upscaling.
+
+    Sizes are produced largest first, each from the previous level: halve
+    with reduce() while the source is at least twice the target, then one
+    LANCZOS resize to the exact size.
+    """
+    levels = {img.width: img}
+    current = img
+    for width in sorted({w for w in widths if w}, reverse=True):
+        if width >= img.width:
+            levels[width] = img
+            continue
+        src = current
+        while src.width >= 2 * width:
+            src = src.reduce(2)
+        height = max(1, round(img.height * width / img.width))
+        levels[width] = current = src.resize((width, height), Image.Resampling.LANCZOS)
+    return levels
+
+
+def encode(img, variant):
+    buf = BytesIO()
+    with metrics.span("render.encode", format=variant.format.lower()):
+        img.save(buf, format=variant.format, **variant.save_options())
+    return buf.getvalue()
+
+
+def encode_variants(img, variants, max_workers=4):
+    """
+    Encodes img once per variant, in parallel (Pillow releases the GIL while
+    encoding). Returns a list of bytes in the order of variants.
+    """
+    levels = build_sizes(img, [v.width for v in variants])
+    jobs = [(levels[v.width] if v.width else img, v) for v in variants]
+    if len(jobs) == 1:
+        return [encode(*jobs[0])]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        return list(pool.map(lambda job: encode(*job), jobs))
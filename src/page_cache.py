@@ -0,0 +1,213 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+DAY = 24 * 3600
+
+
+class CacheEntry:
+    def __init__(self, url, html, etag, last_modified, fetched_at, fresh):
+        self.url = url
+        self.html = html
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.fresh = fresh
+
+    def validators(self):
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    On-disk cache of fetched HTML pages.
+
+    Bodies are zlib-compressed and stored by the SHA-256 of their content
+    (identical pages share one file). A SQLite index maps URL -> body and keeps
+    validators, fetch and access times, so several processes can share one
+    cache directory. When the total body size exceeds max_bytes the least
+    recently used entries are evicted.
+
+    The total size is kept up to date by triggers, so a put never scans the
+    table, and access times are buffered in memory and written in batches,
+    so reads do not take the database write lock.
+    """
+
+    # Buffered access times are written once this many pile up, or after FLUSH_INTERVAL seconds
+    FLUSH_EVERY = 64
+    FLUSH_INTERVAL = 30.0
+
+    # Seconds a page stays fresh, per URL class (see url_class)
+    DEFAULT_TTLS = {
+        'browse': 1 * DAY,     # homepage, browse.php
+        'listing': 7 * DAY,    # make and model listings
+        'spec': 90 * DAY,      # individual car spec pages
+    }
+
+    def __init__(self, cache_dir="cache/pages", max_bytes=512 * 1024 * 1024, ttls=None):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.max_bytes = max_bytes
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "index.sqlite")
+        self._lock = threading.Lock()
+        self._accessed = {}  # url -> access time not yet written
+        self._flushed_at = time.monotonic()
+        with self._connect() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS pages_accessed ON pages(accessed_at);
+                CREATE TABLE IF NOT EXISTS totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    size INTEGER NOT NULL
+                );
+                CREATE TRIGGER IF NOT EXISTS pages_size_insert AFTER INSERT ON pages
+                    BEGIN UPDATE totals SET size = size + NEW.size WHERE id = 0; END;
+                CREATE TRIGGER IF NOT EXISTS pages_size_update AFTER UPDATE OF size ON pages
+                    BEGIN UPDATE totals SET size = size + NEW.size - OLD.size WHERE id = 0; END;
+                CREATE TRIGGER IF NOT EXISTS pages_size_delete AFTER DELETE ON pages
+                    BEGIN UPDATE totals SET size = size - OLD.size WHERE id = 0; END;
+            """)
+            # Caches created before the totals table: count once
+            db.execute("INSERT OR IGNORE INTO totals (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM pages")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + ".html.z")
+
+    @staticmethod
+    def url_class(url):
+        path = urlparse(url).path.strip('/')
+        if not path or path in ('browse.php', 'index.php', 'index.html'):
+            return 'browse'
+        if path.startswith('car/') or (path.startswith('make/') and path.count('/') >= 3):
+            return 'spec'
+        return 'listing'
+
+    def ttl_for(self, url):
+        return self.ttls.get(self.url_class(url), self.ttls['listing'])
+
+    def get(self, url):
+        """Returns a CacheEntry (fresh or stale) or None if the URL is not cached."""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT digest, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (url,)).fetchone()
+            if not row:
+                return None
+            digest, etag, last_modified, fetched_at = row
+            try:
+                with open(self._object_path(digest), 'rb') as f:
+                    html = zlib.decompress(f.read()).decode('utf-8')
+            except (OSError, zlib.error):
+                # Body evicted by another process or corrupted
+                db.execute("DELETE FROM pages WHERE url = ?", (url,))
+                return None
+        self._touch(url)
+
+        fresh = (time.time() - fetched_at) < self.ttl_for(url)
+        return CacheEntry(url, html, etag, last_modified, fetched_at, fresh)
+
+    def _touch(self, url):
+        with self._lock:
+            self._accessed[url] = time.time()
+            due = (len(self._accessed) >= self.FLUSH_EVERY
+                   or time.monotonic() - self._flushed_at >= self.FLUSH_INTERVAL)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Writes buffered access times (LRU order) in one transaction."""
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            self._flushed_at = time.monotonic()
+        if accessed:
+            with self._connect() as db:
+                db.executemany("UPDATE pages SET accessed_at = MAX(accessed_at, ?) WHERE url = ?",
+                               [(t, url) for url, t in accessed.items()])
+
+    def put(self, url, html, etag=None, last_modified=None):
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        # Sized from the blob, not the file: another process may evict the object before the upsert
+        blob = zlib.compress(data, 6)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see a partial body
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp, path)
+
+        now = time.time()
+        with self._connect() as db:
+            # An upsert, not INSERT OR REPLACE: REPLACE deletes without firing the size triggers
+            db.execute(
+                "INSERT INTO pages (url, digest, size, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET digest = excluded.digest, size = excluded.size, "
+                "etag = excluded.etag, last_modified = excluded.last_modified, "
+                "fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at",
+                (url, digest, len(blob), etag, last_modified, now, now))
+            total = db.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+        if total > self.max_bytes:
+            self._evict()
+
+    def mark_fresh(self, url):
+        """Restarts the TTL of an entry after a successful revalidation (304)."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+
+    def _evict(self):
+        # Recent reads must count before picking the least recently used entries
+        self.flush()
+        with self._connect() as db:
+            total = db.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Drop least recently used entries down to 90% of the cap
+            target = int(self.max_bytes * 0.9)
+            for url, digest, size in db.execute(
+                    "SELECT url, digest, size FROM pages ORDER BY accessed_at").fetchall():
+                if total <= target:
+                    break
+                db.execute("DELETE FROM pages WHERE url = ?", (url,))
+                total -= size
+                still_used = db.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+                if not still_used:
+                    try: os.remove(self._object_path(digest))
+                    except OSError: pass
@@ -0,0 +1,273 @@
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src import metrics
+from src.concurrency import SingleFlight
+from src.mock_data import get_country_for_make
+from src.catalog_index import rank_by_name
+
+
+def find_model(models, model_query):
+    """Returns the best model for model_query: exact, substring, then fuzzy match."""
+    return rank_by_name(models, model_query)
+
+
+def stored_record(scraper, make, model=None):
+    """The spec store's record for (make, model), or None if the scraper has no store or no entry."""
+    store = getattr(scraper, 'spec_store', None)
+    record = store.find(make, model) if store else None
+    if store:
+        metrics.cache_lookup('spec_store', record is not None)
+    if record:
+        age_days = (time.time() - record['scraped_at']) / 86400
+        note = ", stale - run --refresh" if record['stale'] else ""
+        print(f"Using stored specs for {make} {model or ''} (scraped {age_days:.1f} days ago{note})")
+    return record
+
+
+def remember_car(scraper, make, model, target_model, target_submodel, specs, make_url, image_path):
+    store = getattr(scraper, 'spec_store', None)
+    if store:
+        store.put(make, model, target_submodel['navigation_url'], specs, make_url=make_url,
+                  model_name=target_model.get('name', ''), model_url=target_model.get('url'),
+                  submodel_name=target_submodel.get('name'), image_path=image_path)
+
+
+def refresh_car(scraper, record):
+    """Re-scrapes the spec page of a spec store record in place, keeping its image unless that changed."""
+    specs = scraper.get_specs(record['config_url'])
+    image_path = record['image_path'] if specs.get('image_url') == record['image_url'] else None
+    scraper.spec_store.put_car(record['config_url'], record['make'], specs, make_url=record['make_url'],
+                               model_name=record['model_name'], model_url=record['model_url'],
+                               submodel_name=record['submodel_name'], image_path=image_path)
+
+
+def needs_image(record):
+    path = record['image_path']
+    return bool(record['image_url']) and not (path and os.path.exists(path))
+
+
+@metrics.timed("pipeline.scrape")
+def scrape_car_data(scraper, make, model=None, refresh=False, fetch_image=True):
+    """
+    Walks make -> model -> submodel -> specs and builds the poster data dict.
+
+    A request already in the scraper's spec store is answered from it
+    without touching the catalog (even if stale); refresh=True re-scrapes.
+    fetch_image=False leaves the image download to a later attach_image().
+    """
+    record = None if refresh else stored_record(scraper, make, model)
+    if record:
+        image_path = record['image_path']
+        if needs_image(record):
+            if not fetch_image:
+                return pending_image(build_car_data(make, record['model_name'], record['specs'], None),
+                                     record['image_url'], record['config_url'])
+            image_path = scraper.fetch_image(record['image_url'])
+            scraper.spec_store.set_image_path(record['config_url'], image_path)
+        return build_car_data(make, record['model_name'], record['specs'], image_path)
+
+    # 1. Search Make
+    print(f"Searching for make: {make}...")
+    make_url = scraper.search_make(make)
+    print(f"Found make URL: {make_url}")
+
+    # 2. Get Models
+    print("Fetching models...")
+    models = scraper.get_models(make_url)
+
+    if not models:
+        raise Exception("No models found for this make.")
+
+    target_model = pick_model(models, model)
+
+    # 3. Get Submodels (Mandatory for accurate specs/image)
+    print(f"Fetching submodels for {target_model['name']}...")
+    submodels = scraper.get_submodels(target_model['url'])
+    target_submodel = pick_submodel(target_model, submodels)
+
+    # 4. Get Specs from the specific car page
+    print(f"Fetching detailed specs for {target_submodel['name']}...")
+    specs = scraper.get_specs(target_submodel['navigation_url'])
+
+    # 5. Download car image
+    image_path = None
+    if specs.get('image_url') and fetch_image:
+        print(f"Downloading car image...")
+        image_path = scraper.fetch_image(specs['image_url'])
+
+    remember_car(scraper, make, model, target_model, target_submodel, specs, make_url, image_path)
+    car_data = build_car_data(make, target_model.get('name', ''), specs, image_path)
+    if specs.get('image_url') and not fetch_image:
+        return pending_image(car_data, specs['image_url'], target_submodel['navigation_url'])
+    return car_data
+
+
+def pending_image(car_data, image_url, config_url):
+    """Marks car_data's image as not downloaded yet (see attach_image)."""
+    car_data['pending_image'] = {'url': image_url, 'config_url': config_url}
+    return car_data
+
+
+def attach_image(scraper, car_data):
+    """Downloads the image left pending by scrape_car_data(fetch_image=False) and records it in the spec store."""
+    pending = car_data.pop('pending_image', None)
+    if pending:
+        print(f"Downloading car image...")
+        car_data['image_path'] = scraper.fetch_image(pending['url'])
+        store = getattr(scraper, 'spec_store', None)
+        if store and car_data['image_path']:
+            store.set_image_path(pending['config_url'], car_data['image_path'])
+    return car_data
+
+
+@metrics.timed("pipeline.scrape")
+async def scrape_car_data_async(scraper, make, model=None, refresh=False):
+    """scrape_car_data for an AsyncCarScraper; spec store access runs off the event loop."""
+    record = None if refresh else await asyncio.to_thread(stored_record, scraper, make, model)
+    if record:
+        image_path = record['image_path']
+        if needs_image(record):
+            image_path = await scraper.fetch_image(record['image_url'])
+            await asyncio.to_thread(scraper.spec_store.set_image_path, record['config_url'], image_path)
+        return build_car_data(make, record['model_name'], record['specs'], image_path)
+
+    make_url = await scraper.search_make(make)
+    models = await scraper.get_models(make_url)
+    if not models:
+        raise Exception("No models found for this make.")
+    target_model = pick_model(models, model)
+
+    submodels = await scraper.get_submodels(target_model['url'])
+    target_submodel = pick_submodel(target_model, submodels)
+    specs = await scraper.get_specs(target_submodel['navigation_url'])
+
+    image_path = None
+    if specs.get('image_url'):
+        image_path = await scraper.fetch_image(specs['image_url'])
+
+    await asyncio.to_thread(remember_car, scraper, make, model, target_model, target_submodel, specs,
+                            make_url, image_path)
+    return build_car_data(make, target_model.get('name', ''), specs, image_path)
+
+
+def scrape_all_submodels(scraper, make, model=None, workers=4, refresh=False):
+    """
+    Builds poster data for every submodel of a model.
+
+    The make, model and submodel pages are fetched once; the spec pages and
+    images of all submodels are then fetched on `workers` threads. A spec
+    page already in the spec store (and fresh) is not fetched again, the
+    year and picto image from the submodel table stand in for ones missing
+    on the spec page, and an image shared by several submodels is
+    downloaded once. Yields (submodel_name, car_data, error) in completion
+    order; a failing submodel does not stop the others.
+    """
+    print(f"Searching for make: {make}...")
+    make_url = scraper.search_make(make)
+    models = scraper.get_models(make_url)
+    if not models:
+        raise Exception("No models found for this make.")
+    target_model = pick_model(models, model)
+
+    print(f"Fetching submodels for {target_model['name']}...")
+    submodels = scraper.get_submodels(target_model['url'])
+    targets = [s for s in submodels if s.get('navigation_url')] or [pick_submodel(target_model, [])]
+    print(f"{len(targets)} submodels to render")
+    store = getattr(scraper, 'spec_store', None)
+    images = SingleFlight()
+
+    def scrape_one(name, submodel):
+        url = submodel['navigation_url']
+        record = store.get_car(url) if store and not refresh else None
+        if record and not record['stale']:
+            metrics.cache_lookup('spec_store', True)
+            specs, image_path = record['specs'], record['image_path']
+        else:
+            if store:
+                metrics.cache_lookup('spec_store', False)
+            specs, image_path = scraper.get_specs(url), None
+
+        # The submodel table already has the production years and a picto image
+        if specs.get('year', 'N/A') == 'N/A' and submodel.get('year', 'N/A') != 'N/A':
+            specs['year'] = submodel['year']
+        image_url = specs.get('image_url') or submodel.get('image_url')
+        if image_url and not (image_path and os.path.exists(image_path)):
+            image_path = images.do(image_url, lambda: scraper.fetch_image(image_url))
+
+        if store and (record is None or record['stale']):
+            store.put_car(url, make, specs, make_url=make_url, model_name=target_model.get('name', ''),
+                          model_url=target_model.get('url'), submodel_name=submodel['name'],
+                          image_path=image_path)
+        elif store and image_path != record['image_path']:
+            # Reused specs keep their scrape time; only the image is new
+            store.set_image_path(url, image_path)
+        return build_car_data(make, name, specs, image_path)
+
+    # Submodels with the same title get a suffix so their posters don't overwrite each other
+    named, seen = [], {}
+    for submodel in targets:
+        seen[submodel['name']] = count = seen.get(submodel['name'], 0) + 1
+        named.append((submodel['name'] if count == 1 else f"{submodel['name']} ({count})", submodel))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(scrape_one, name, s): name for name, s in named}
+        for fut in as_completed(futures):
+            try:
+                yield futures[fut], fut.result(), None
+            except Exception as e:
+                yield futures[fut], None, e
+
+
+def pick_model(models, model=None):
+    # If user specified model, search for it
+    if model:
+        target_model = find_model(models, model)
+        if not target_model:
+            print(f"Model '{model}' not found. Using first available: {models[0]['name']}")
+            target_model = models[0]
+    else:
+        target_model = models[0]
+        print(f"No model specified. Using first available: {target_model['name']}")
+    return target_model
+
+
+def pick_submodel(target_model, submodels):
+    if not submodels:
+        # Fallback to model page if no submodels found (unlikely)
+        target_submodel = target_model
+        target_submodel['navigation_url'] = target_model['url']
+    else:
+        # Prefer the first one (usually the base/launch model)
+        target_submodel = submodels[0]
+        print(f"Using submodel: {target_submodel['name']}")
+    return target_submodel
+
+
+def build_car_data(make, raw_model_name, specs, image_path):
+    """Builds the data structure consumed by PosterGenerator.create_poster."""
+    # Extract year range (e.g. 2016-2023) if present in the raw name
+    year_match = re.search(r'(\d{4}\s*-\s*\d{4})', raw_model_name)
+    year_display = year_match.group(1) if year_match else specs.get('year', 'N/A')
+
+    # Clean the model name for the header
+    clean_model = re.sub(r'\s*\(?\d{4}-\d{4}\)?', '', raw_model_name).strip()
+
+    return {
+        'make': make,
+        'model': clean_model,
+        'year': year_display,
+        'specs': {
+            'engine': specs.get('engine', '-'),
+            'power': specs.get('power', '-'),
+            'torque': specs.get('torque', '-'),
+            'weight': specs.get('weight', '-'),
+            '0-100': specs.get('0-100', '-'),
+            'top_speed': specs.get('top_speed', '-')
+        },
+        'country_code': get_country_for_make(make),
+        'image_path': image_path
+    }
@@ -1,11 +1,92 @@
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageOps
+from PIL import Image, ImageChops, ImageDraw, ImageFont, ImageFilter, ImageOps
 import os
 import io
 from io import BytesIO
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+from src import metrics
+from src.cutout_cache import CutoutCache, DEFAULT_MODEL
+from src.output_spec import POSTER_WIDTH, build_sizes, encode, encode_variants, parse_output_spec
+
+# Candidate sizes for the header, largest first (same steps as before)
+TITLE_SIZES = tuple(range(180, 60, -10))
+SUBTITLE_SIZES = tuple(range(110, 40, -5))
+
+# Footer grid: first four in the left column, the rest in the right one
+SPEC_LABELS = ("Engine", "Power", "Torque", "Weight", "0-100 km/h", "Top speed")
+FLAG_SIZE = (90, 60)
+
+# Car shadows: (height, ellipse insets left/top/right/bottom, alpha, blur radius)
+SHADOW_STYLES = {
+    'ambient': (100, (20, 20, 20, 10), 35, 35),  # Soft and widespread
+    'contact': (40, (40, 10, 40, 5), 90, 6),     # Darker and sharper under tires
+}
+
+
+@lru_cache(maxsize=None)
+def load_font(face, size):
+    """ImageFont.truetype, cached per process. Returns None if the face can't be loaded."""
+    try:
+        return ImageFont.truetype(face, size)
+    except:
+        return None
+
+
+@lru_cache(maxsize=None)
+def default_font():
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=None)
+def load_flag(country_code):
+    """Flag from assets/flags, resized to FLAG_SIZE once per process. None if missing."""
+    flag_path = f"assets/flags/{country_code}.png"
+    if not os.path.exists(flag_path):
+        return None
+    try:
+        flag_img = Image.open(flag_path).convert("RGBA")
+        return flag_img.resize(FLAG_SIZE, Image.Resampling.LANCZOS)
+    except:
+        return None
+
+
+@lru_cache(maxsize=16)
+def shadow_layer(width, style):
+    """Blurred RGBA shadow of the given SHADOW_STYLES style, built once per (width, style)."""
+    height, (left, top, right, bottom), alpha, radius = SHADOW_STYLES[style]
+    shadow = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(shadow).ellipse([left, top, width - right, height - bottom], fill=(0, 0, 0, alpha))
+    return shadow.filter(ImageFilter.GaussianBlur(radius))
+
+
+def _intersects(a, b):
+    return a is not None and a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+# Scratch surface for measuring text (same mode as the poster canvas)
+_MEASURE = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
+
+@lru_cache(maxsize=4096)
+def text_width(font, text, stroke_width=0):
+    """Rendered width of text; memoized, so fixed labels are measured once per process."""
+    bbox = _MEASURE.textbbox((0, 0), text, font=font, stroke_width=stroke_width)
+    return bbox[2] - bbox[0]
+
 
 class PosterGenerator:
-    def __init__(self, output_dir="output"):
-        self.width = 1080
+    # Layout (pixels on the 1080x1350 canvas)
+    MARGIN = 100
+    BLOCK_Y = 350
+    BLOCK_HEIGHT = 700
+    FOOTER_Y = 1120
+
+    def __init__(self, output_dir="output", rembg_model=DEFAULT_MODEL, cutout_dir="cache/cutouts",
+                 output_spec=None):
+        self.width = POSTER_WIDTH
         self.height = 1350
         self.output_dir = output_dir
         if not os.path.exists(output_dir):
@@ -15,33 +96,236 @@ class PosterGenerator:
         self.font_main = "bahnschrift.ttf"
         self.font_fallback = "arial.ttf"
 
+        # One rembg session per generator; cut-outs cached by source hash
+        self.cutouts = CutoutCache(cutout_dir, rembg_model)
+        # Formats/sizes written for every poster (see src/output_spec.py)
+        self.output_spec = parse_output_spec(output_spec)
+        self._worker_args = (output_dir, rembg_model, cutout_dir, self.output_spec)
+
+        # Static layers, rendered on first use
+        self._template_cache = None
+        self._template_lock = threading.Lock()
+
+    def warm_up(self):
+        """Loads fonts, renders the templates and opens the rembg session ahead of the first poster."""
+        self._templates()
+        try:
+            self.cutouts.session()
+        except Exception as e:
+            print(f"[WARN] rembg unavailable, posters will keep the original background: {e}")
+
+    def prewarm(self, done=None):
+        """
+        Runs warm_up() on a background thread, e.g. while scraping. A render
+        that starts before it finishes waits for the part it needs instead of
+        loading it again. done() is called after warm-up.
+        """
+        def run():
+            self.warm_up()
+            if done:
+                done()
+        thread = threading.Thread(target=run, name="poster-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def render_many(self, car_data_items, workers=None):
+        """
+        Renders car_data_items on a pool of `workers` processes (default: CPU count).
+
+        Each worker builds its own generator once (fonts, templates, rembg
+        session). Yields (index, output_path, error) in completion order, where
+        index is the item's position in car_data_items and error is None on
+        success; a failing poster does not affect the others. When metrics
+        are enabled, the workers record spans too and send them back with
+        each result.
+        """
+        workers = workers or os.cpu_count() or 1
+        items = enumerate(car_data_items)
+        # Spawned, not forked: callers may have scraper threads running (holding locks) at this point
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_render_worker,
+                                 initargs=self._worker_args + (metrics.ENABLED,)) as pool:
+            # Keep a couple of jobs queued per worker instead of submitting everything up front
+            pending = set()
+            for index, car_data in items:
+                pending.add(pool.submit(_render_job, index, car_data))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        yield _merge_worker_result(fut.result())
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield _merge_worker_result(fut.result())
+
     def _get_font(self, size, bold=False, condensed=False):
-        """Helper to safely load bahnschrift or arial."""
+        """Helper to safely load bahnschrift or arial (cached by face and size)."""
+        font = load_font(self.font_main, size)
+        if font is None:
+            font = load_font("arialbd.ttf" if bold else "arial.ttf", size)
+        return font or default_font()
+
+    def _fit_size(self, text, sizes, max_width, bold=False, stroke_width=0):
+        """
+        Binary-searches sizes (descending) for the largest one whose text fits
+        max_width. Returns None if even the smallest is too wide.
+        """
+        lo, hi = 0, len(sizes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text_width(self._get_font(sizes[mid], bold), text, stroke_width) <= max_width:
+                hi = mid
+            else:
+                lo = mid + 1
+        return sizes[lo] if lo < len(sizes) else None
+
+    def _templates(self):
+        """
+        Returns (base, template, labels_box), rendered once per generator.
+
+        base is the white canvas with the grey block; template adds the static
+        footer (YEAR label, divider, spec labels). labels_box is the pixel
+        bbox of that footer overlay.
+        """
+        if self._template_cache is None:
+            with self._template_lock:
+                if self._template_cache is None:
+                    # 1. Create Canvas (Clean White)
+                    base = Image.new('RGB', (self.width, self.height), color=(255, 255, 255))
+                    draw = ImageDraw.Draw(base)
+
+                    # 2. Draw Grey Block
+                    block_color = (242, 242, 242) # Very light grey
+                    block_width = int(self.width * 0.75)
+                    block_x = (self.width - block_width) // 2
+                    draw.rectangle([block_x, self.BLOCK_Y, block_x + block_width, self.BLOCK_Y + self.BLOCK_HEIGHT],
+                                   fill=block_color)
+
+                    template = base.copy()
+                    self._draw_footer_labels(ImageDraw.Draw(template))
+                    labels_box = ImageChops.difference(base, template).getbbox()
+                    self._template_cache = (base, template, labels_box)
+        return self._template_cache
+
+    def _draw_footer_labels(self, draw):
+        """Draws the static part of the footer: YEAR label, divider and spec labels."""
+        footer_y = self.FOOTER_Y
+        # Refined: Large bold label, small bold value closer together
+        year_label_font = self._get_font(44, bold=True)
+        draw.text((self.MARGIN, footer_y), "YEAR", font=year_label_font, fill=(0, 0, 0), stroke_width=1)
+
+        # Divider Line (Vertical)
+        line_x = self.MARGIN + 200
+        draw.line([line_x, footer_y, line_x, footer_y + 180], fill=(200, 200, 205), width=2)
+
+        # Bold labels using stroke_width=1
+        label_font = self._get_font(24, bold=True)
+        for x, y, label in self._spec_slots():
+            draw.text((x, y), label, font=label_font, fill=(40, 40, 45), stroke_width=1)
+
+    def _spec_slots(self):
+        """(x, y, label) of every spec in the footer grid."""
+        col1_x = self.MARGIN + 200 + 50
+        col2_x = col1_x + 360 # Increased spacing
+        row_h = 50
+        slots = [(col1_x, self.FOOTER_Y + i * row_h, label) for i, label in enumerate(SPEC_LABELS[:4])]
+        slots += [(col2_x, self.FOOTER_Y + i * row_h, label) for i, label in enumerate(SPEC_LABELS[4:])]
+        return slots
+
+    def _car_layers(self, image_path):
+        """Returns the RGBA layers (shadows, car) to paste for the car image, as [(layer, (x, y))]."""
+        if not (image_path and os.path.exists(image_path)):
+            return []
+        block_y, block_height = self.BLOCK_Y, self.BLOCK_HEIGHT
         try:
-            return ImageFont.truetype(self.font_main, size)
-        except:
-            try:
-                fname = "arialbd.ttf" if bold else "arial.ttf"
-                return ImageFont.truetype(fname, size)
-            except:
-                return ImageFont.load_default()
+            # Background removed + autocropped (cached per image and model)
+            with metrics.span("render.cutout"):
+                car_img = self.cutouts.get(image_path)
+
+            # Resize
+            target_width = int(self.width * 0.90)
+            ratio = target_width / car_img.width
+            target_height = int(car_img.height * ratio)
+            with metrics.span("render.resize"):
+                car_img = car_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+
+            # Position
+            x_pos = (self.width - target_width) // 2
+            y_pos = block_y + (block_height // 2) - (target_height // 2) + 100
+
+            # Dual-Layer Shadow (Reference Style), cached per width
+            with metrics.span("render.shadows"):
+                ambient = shadow_layer(target_width, 'ambient')
+                contact = shadow_layer(target_width, 'contact')
+            return [(ambient, (x_pos, y_pos + target_height - 60)),
+                    (contact, (x_pos, y_pos + target_height - 35)),
+                    (car_img, (x_pos, y_pos))]
+
+        except Exception as e:
+            print(f"Error processing image: {e}")
+            car_img = Image.open(image_path).convert("RGBA")
+
+            # Autocrop fallback
+            bbox = car_img.getbbox()
+            if bbox:
+                car_img = car_img.crop(bbox)
+
+            target_width = self.width - (self.MARGIN * 2)
+            ratio = target_width / car_img.width
+            target_height = int(car_img.height * ratio)
+            car_img = car_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            return [(car_img, (self.MARGIN, 500))]
 
     def create_poster(self, car_data):
-        # 1. Create Canvas (Clean White)
-        bg_color = (255, 255, 255)
-        img = Image.new('RGB', (self.width, self.height), color=bg_color)
+        """Renders car_data and writes every output variant. Returns the path of the first one."""
+        return self.render_outputs(car_data)[0]
+
+    def render_outputs(self, car_data):
+        """Renders car_data once and writes all variants of the output spec. Returns their paths."""
+        img = self.render(car_data)
+        stem = f"{car_data['make']}_{car_data['model']}".replace(" ", "_").replace("/", "_").lower()
+        return self.save_outputs(img, stem)
+
+    def render_bytes(self, car_data, variant=None):
+        """
+        Renders car_data and returns the encoded poster as bytes, without
+        touching the output directory. variant is an OutputVariant or a spec
+        item such as "webp@540:80"; defaults to the first of the output spec.
+        """
+        if variant is None:
+            variant = self.output_spec[0]
+        elif isinstance(variant, str):
+            variant = parse_output_spec(variant)[0]
+        img = self.render(car_data)
+        if variant.width:
+            img = build_sizes(img, [variant.width])[variant.width]
+        return encode(img, variant)
+
+    def save_outputs(self, img, stem):
+        paths = []
+        for variant, data in zip(self.output_spec, encode_variants(img, self.output_spec)):
+            output_path = os.path.join(self.output_dir, variant.filename(stem, img.width))
+            with metrics.span("render.write"), open(output_path, 'wb') as f:
+                f.write(data)
+            paths.append(output_path)
+        print(f"Assignment-style poster saved to {', '.join(paths)}")
+        return paths
+
+    @metrics.timed("render.compose")
+    def render(self, car_data):
+        """Draws the poster for car_data and returns it as an RGB image."""
+        base, template, labels_box = self._templates()
+        margin = self.MARGIN
+        footer_y = self.FOOTER_Y
+
+        # Car layers first: if they reach into the footer, the static labels
+        # must be drawn over them, so start from the bare canvas instead.
+        car_layers = self._car_layers(car_data.get('image_path'))
+        labels_covered = any(_intersects(labels_box, (x, y, x + layer.width, y + layer.height))
+                             for layer, (x, y) in car_layers)
+        img = (base if labels_covered else template).copy()
         draw = ImageDraw.Draw(img)
 
-        margin = 100
-
-        # 2. Draw Grey Block
-        block_color = (242, 242, 242) # Very light grey
-        block_width = int(self.width * 0.75)
-        block_height = 700
-        block_x = (self.width - block_width) // 2
-        block_y = 350
-        draw.rectangle([block_x, block_y, block_x + block_width, block_y + block_height], fill=block_color)
-
         # 3. Typography (Top Left)
         make_text = car_data['make'].upper()
         model_text = car_data['model'].upper()
@@ -51,13 +335,14 @@ class PosterGenerator:
             model_text = model_text[len(make_text):].strip()
 
         # Dynamic Scaling for Make Name
-        title_size = 180
-        while title_size > 60:
+        max_text_width = self.width - 2 * margin
+        title_size = self._fit_size(make_text, TITLE_SIZES, max_text_width, bold=True, stroke_width=2)
+        if title_size is None:
+            # Nothing fits: smallest font, header offset as if one more step was taken
+            title_font = self._get_font(TITLE_SIZES[-1], bold=True)
+            title_size = TITLE_SIZES[-1] - 10
+        else:
             title_font = self._get_font(title_size, bold=True)
-            bbox = draw.textbbox((margin, margin), make_text, font=title_font, stroke_width=2)
-            if (bbox[2] - bbox[0]) <= (self.width - 2 * margin):
-                break
-            title_size -= 10
 
         make_color = (130, 130, 135) # Slightly darker grey for better visibility
         model_color = (0, 0, 0)       # Black for model
@@ -66,102 +351,32 @@ class PosterGenerator:
         draw.text((margin, margin), make_text, font=title_font, fill=make_color, stroke_width=3)
 
         # Dynamic Scaling for Model Name
-        subtitle_size = 110
-        while subtitle_size > 40:
-            subtitle_font = self._get_font(subtitle_size, bold=True)
-            # Offset vertical position based on title_size
-            y_offset = margin + int(title_size * 0.95)
-            bbox = draw.textbbox((margin, y_offset), model_text, font=subtitle_font)
-            if (bbox[2] - bbox[0]) <= (self.width - 2 * margin):
-                break
-            subtitle_size -= 5
+        subtitle_size = self._fit_size(model_text, SUBTITLE_SIZES, max_text_width, bold=True)
+        subtitle_font = self._get_font(subtitle_size or SUBTITLE_SIZES[-1], bold=True)
+        # Offset vertical position based on title_size
+        y_offset = margin + int(title_size * 0.95)
 
         draw.text((margin, y_offset), model_text, font=subtitle_font, fill=model_color)
 
         # 4. Car Image (Centered with Shadow and BG removal)
-        image_path = car_data.get('image_path')
-        if image_path and os.path.exists(image_path):
-            try:
-                from rembg import remove
-                with open(image_path, 'rb') as i:
-                    input_data = i.read()
-                    output_data = remove(input_data)
-
-                car_img = Image.open(io.BytesIO(output_data)).convert("RGBA")
-
-                # --- NEW: Autocrop to remove transparent margins ---
-                bbox = car_img.getbbox()
-                if bbox:
-                    car_img = car_img.crop(bbox)
-                # --------------------------------------------------
-
-                # Resize
-                target_width = int(self.width * 0.90)
-                ratio = target_width / car_img.width
-                target_height = int(car_img.height * ratio)
-                car_img = car_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+        for layer, pos in car_layers:
+            img.paste(layer, pos, layer)
 
-                # Position
-                y_pos = block_y + (block_height // 2) - (target_height // 2) + 100
-
-                # --- NEW: Dual-Layer Shadow (Reference Style) ---
-                # 1. Ambient Shadow (Soft and widespread)
-                ambient_h = 100
-                ambient_shadow = Image.new('RGBA', (target_width, ambient_h), (0, 0, 0, 0))
-                a_draw = ImageDraw.Draw(ambient_shadow)
-                a_draw.ellipse([20, 20, target_width - 20, ambient_h - 10], fill=(0, 0, 0, 35))
-                ambient_shadow = ambient_shadow.filter(ImageFilter.GaussianBlur(35))
-                img.paste(ambient_shadow, ((self.width - target_width) // 2, y_pos + target_height - 60), ambient_shadow)
-
-                # 2. Contact Shadow (Darker and sharper under tires)
-                contact_h = 40
-                contact_shadow = Image.new('RGBA', (target_width, contact_h), (0, 0, 0, 0))
-                c_draw = ImageDraw.Draw(contact_shadow)
-                c_draw.ellipse([40, 10, target_width - 40, contact_h - 5], fill=(0, 0, 0, 90))
-                contact_shadow = contact_shadow.filter(ImageFilter.GaussianBlur(6))
-                img.paste(contact_shadow, ((self.width - target_width) // 2, y_pos + target_height - 35), contact_shadow)
-                # -----------------------------------------------
-
-                img.paste(car_img, ((self.width - target_width) // 2, y_pos), car_img)
-
-            except Exception as e:
-                print(f"Error processing image: {e}")
-                car_img = Image.open(image_path).convert("RGBA")
-
-                # Autocrop fallback
-                bbox = car_img.getbbox()
-                if bbox:
-                    car_img = car_img.crop(bbox)
-
-                target_width = self.width - (margin * 2)
-                ratio = target_width / car_img.width
-                target_height = int(car_img.height * ratio)
-                car_img = car_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-                img.paste(car_img, (margin, 500), car_img)
+        # 5. Footer (YEAR left, Specs Grid right); labels come from the template
+        if labels_covered:
+            self._draw_footer_labels(draw)
 
-        # 5. Footer (YEAR left, Specs Grid right)
-        footer_y = 1120
-        label_font = self._get_font(24, bold=True)
         # Spec values same size as labels, but regular weight
+        label_font = self._get_font(24, bold=True)
         spec_value_font = self._get_font(24)
-
-        label_color_dark = (40, 40, 45)
         value_color_black = (0, 0, 0)
         grey_text_color = (120, 120, 125)
 
-        # 5.1 YEAR Block
-        # Refined: Large bold label, small bold value closer together
-        year_label_font = self._get_font(44, bold=True)
+        # 5.1 YEAR value
         year_value_font = self._get_font(22, bold=True)
-
-        draw.text((margin, footer_y), "YEAR", font=year_label_font, fill=value_color_black, stroke_width=1)
         # Vertical gap reduced (footer_y + 48)
         draw.text((margin, footer_y + 48), str(car_data.get('year', 'N/A')), font=year_value_font, fill=grey_text_color)
 
-        # Divider Line (Vertical)
-        line_x = margin + 200
-        draw.line([line_x, footer_y, line_x, footer_y + 180], fill=(200, 200, 205), width=2)
-
         # 5.2 Specs Columns
         raw_specs = car_data.get('specs', {})
         specs = {k.lower(): v for k, v in raw_specs.items()}
@@ -194,56 +409,52 @@ class PosterGenerator:
         else: formatted_top = top_val
         # ------------------------------------
 
-        col1_x = line_x + 50
-        col2_x = col1_x + 360 # Increased spacing
-        row_h = 50
-
-        col1_items = [
-            ("Engine", formatted_engine),
-            ("Power", specs.get("power")),
-            ("Torque", torque_val),
-            ("Weight", specs.get("weight"))
-        ]
+        values = [formatted_engine, specs.get("power"), torque_val, specs.get("weight"),
+                  formatted_accel, formatted_top]
 
-        col2_items = [
-            ("0-100 km/h", formatted_accel),
-            ("Top speed", formatted_top)
-        ]
-
-        def draw_spec(x, y, label, val):
-            # Bold labels using stroke_width=1
-            draw.text((x, y), label, font=label_font, fill=label_color_dark, stroke_width=1)
-
-            # Dynamic proximity: Get label width to place value precisely
-            bbox = draw.textbbox((x, y), label, font=label_font, stroke_width=1)
-            label_w = bbox[2] - bbox[0]
+        for (x, y, label), val in zip(self._spec_slots(), values):
+            # Dynamic proximity: Get label width to place value precisely (memoized)
+            label_w = text_width(label_font, label, 1)
 
             display_val = str(val) if (val and val != "N/A" and val != "-") else "N/A"
             # Place value with a small consistent gap (15px)
             draw.text((x + label_w + 15, y), display_val, font=spec_value_font, fill=value_color_black)
 
-        for i, (lbl, val) in enumerate(col1_items):
-            draw_spec(col1_x, footer_y + i * row_h, lbl, val)
+        # 5.3 Flag (Bottom Right), pre-scaled once per country
+        country_code = car_data.get('country_code', 'de').lower()
+        flag_img = load_flag(country_code)
+        if flag_img is not None:
+            img.paste(flag_img, (self.width - margin - 90, footer_y + 115), flag_img)
 
-        for i, (lbl, val) in enumerate(col2_items):
-            draw_spec(col2_x, footer_y + i * row_h, lbl, val)
+        return img
+
+# Generator owned by each render_many worker process
+_worker_generator = None
+
+
+def _init_render_worker(output_dir, rembg_model, cutout_dir, output_spec, metrics_enabled=False):
+    global _worker_generator
+    if metrics_enabled:
+        # Spans are aggregated here and sent back with each result (no span log per worker)
+        metrics.enable()
+    _worker_generator = PosterGenerator(output_dir, rembg_model, cutout_dir, output_spec)
+    _worker_generator.warm_up()
+
+
+def _render_job(index, car_data):
+    """(index, path, error, metrics recorded since the last job) of one poster."""
+    try:
+        result = index, _worker_generator.create_poster(car_data), None
+    except Exception as e:
+        result = index, None, str(e)
+    return result + (metrics.drain() if metrics.ENABLED else None,)
+
+
+def _merge_worker_result(result):
+    index, path, error, stats = result
+    metrics.merge(stats)
+    return index, path, error
 
-        # 5.3 Flag (Bottom Right)
-        country_code = car_data.get('country_code', 'de').lower()
-        flag_path = f"assets/flags/{country_code}.png"
-        if os.path.exists(flag_path):
-            try:
-                flag_img = Image.open(flag_path).convert("RGBA")
-                flag_img = flag_img.resize((90, 60), Image.Resampling.LANCZOS)
-                img.paste(flag_img, (self.width - margin - 90, footer_y + 115), flag_img)
-            except: pass
-
-        # 6. Save
-        output_filename = f"{car_data['make']}_{car_data['model']}.png".replace(" ", "_").replace("/", "_").lower()
-        output_path = os.path.join(self.output_dir, output_filename)
-        img.save(output_path)
-        print(f"Assignment-style poster saved to {output_path}")
-        return output_path
 
 if __name__ == "__main__":
     from mock_data import MOCK_CAR_DATA
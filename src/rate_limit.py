@@ -0,0 +1,204 @@
+"""
+Shared fetch scheduler: per-host pacing, concurrency caps and retries.
+
+Every network fetch of a CarScraper goes through one FetchScheduler:
+
+- a token bucket per host paces requests (reservations queue up, so
+  concurrent callers are spread out instead of bursting);
+- a per-host semaphore caps requests in flight;
+- a failed attempt (429/5xx, connection error, unresolved Cloudflare
+  challenge) is retried with exponential backoff and full jitter, waiting
+  at least as long as the server's Retry-After;
+- throttling responses (429, any Retry-After, or a Cloudflare challenge)
+  halve the host's rate,
+  which then climbs back by 5% of the ceiling per success, so sustained throughput settles just under what
+  the site tolerates.
+"""
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from src import metrics
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429}
+
+
+class FetchError(Exception):
+    """A fetch that failed for good (non-retryable status or retries exhausted)."""
+
+    def __init__(self, url, reason, status=None):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.reason = reason
+        self.status = status
+
+
+class Retry(Exception):
+    """Raised by a fetch attempt to ask the scheduler for another try."""
+
+    def __init__(self, reason, status=None, retry_after=None, throttle=False):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = parse_retry_after(retry_after)
+        # The site is pushing back (e.g. a challenge page): lower the host's rate too
+        self.throttle = throttle or status in THROTTLE_STATUSES
+
+
+def parse_retry_after(value):
+    """Retry-After header (seconds or HTTP date) -> seconds, or None."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return max(0.0, float(value))
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+class TokenBucket:
+    """Token bucket whose rate can be lowered and raised at runtime (AIMD)."""
+
+    def __init__(self, rate, burst, min_rate=0.5):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes one token and returns how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class FetchScheduler:
+    def __init__(self, rate=5.0, burst=10, per_host=4, max_retries=4, backoff_base=1.0, backoff_max=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.per_host = per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._buckets = {}
+        self._slots = {}
+        self._not_before = {}
+        self._lock = threading.Lock()
+
+    def _host_state(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+                self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return bucket, self._slots[host]
+
+    def _delay(self, host, bucket):
+        """Seconds until this caller may send: its token reservation or a host-wide pause, whichever is later."""
+        wait = bucket.reserve()
+        with self._lock:
+            paused = self._not_before.get(host, 0.0) - time.monotonic()
+        return max(wait, paused)
+
+    def backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max * 5))
+        return delay
+
+    def _failed(self, host, bucket, retry, attempt):
+        delay = self.backoff(attempt, retry.retry_after)
+        if retry.throttle or retry.retry_after is not None:
+            # The site is pushing back: slow the whole host down, not just this request
+            bucket.throttled()
+            with self._lock:
+                self._not_before[host] = max(self._not_before.get(host, 0.0), time.monotonic() + delay)
+        return delay
+
+    @contextmanager
+    def slot(self, url):
+        """Waits for the host's pacing and holds one of its concurrency slots."""
+        host = host_of(url)
+        bucket, slots = self._host_state(host)
+        with slots:
+            delay = self._delay(host, bucket)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+
+    def fetch(self, url, attempt):
+        """
+        Runs attempt() inside a slot, retrying when it raises Retry.
+        Returns its result; raises FetchError once retries are exhausted.
+        """
+        host = host_of(url)
+        bucket, _ = self._host_state(host)
+        for n in range(self.max_retries + 1):
+            try:
+                with self.slot(url):
+                    result = attempt()
+                bucket.succeeded()
+                return result
+            except Retry as retry:
+                metrics.count('fetch_retries', reason=retry.reason.split(' (')[0])
+                if n == self.max_retries:
+                    raise FetchError(url, f"{retry.reason} (gave up after {n + 1} attempts)", retry.status)
+                delay = self._failed(host, bucket, retry, n)
+                print(f"[RETRY] {url}: {retry.reason}, retrying in {delay:.1f}s ({n + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    async def wait_async(self, url):
+        """Async counterpart of slot() pacing (concurrency is capped by the caller's own semaphore)."""
+        host = host_of(url)
+        bucket, _ = self._host_state(host)
+        delay = self._delay(host, bucket)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def fetch_async(self, url, attempt):
+        """fetch() for a coroutine function attempt."""
+        host = host_of(url)
+        bucket, _ = self._host_state(host)
+        for n in range(self.max_retries + 1):
+            try:
+                await self.wait_async(url)
+                result = await attempt()
+                bucket.succeeded()
+                return result
+            except Retry as retry:
+                metrics.count('fetch_retries', reason=retry.reason.split(' (')[0])
+                if n == self.max_retries:
+                    raise FetchError(url, f"{retry.reason} (gave up after {n + 1} attempts)", retry.status)
+                delay = self._failed(host, bucket, retry, n)
+                print(f"[RETRY] {url}: {retry.reason}, retrying in {delay:.1f}s ({n + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
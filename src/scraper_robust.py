@@ -1,42 +1,84 @@
 import requests
-from bs4 import BeautifulSoup
 import re
 from urllib.parse import urljoin
 import time
 import os
 import pickle
-
-# Try DrissionPage, but don't fail if missing
-try:
-    from DrissionPage import ChromiumPage
-    HAS_DRISSION = True
-except ImportError:
-    HAS_DRISSION = False
-    print("WARNING: DrissionPage not found. Using requests (limited capability).")
+import threading
+from functools import lru_cache
+from src.page_cache import PageCache
+from src.catalog_index import CatalogIndex
+from src.spec_extract import extract_specs, normalize_text
+from src.html_parser import make_soup, iter_links, STRAIN_TABLES
+from src.tab_pool import TabPool
+from src.cloudflare import ClearanceStats, is_challenge, is_challenge_response, wait_for_clearance
+from src.image_store import ImageStore
+from src.spec_store import SpecStore
+from src import metrics
+from src.rate_limit import FetchError, FetchScheduler, Retry, RETRY_STATUSES
+
+@lru_cache(maxsize=None)
+def has_drission():
+    """Imports DrissionPage on first use (it is slow to import); False if it is missing."""
+    try:
+        import DrissionPage  # noqa: F401
+        return True
+    except ImportError:
+        print("WARNING: DrissionPage not found. Using requests (limited capability).")
+        return False
 
 class CarScraper:
     BASE_URL = "https://www.automobile-catalog.com/"
     COOKIES_FILE = "cf_cookies.pkl"
-
-    def __init__(self, use_drission=True):
-        self.use_drission = use_drission and HAS_DRISSION
+    IMAGE_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Referer': BASE_URL,
+        'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8'
+    }
+
+    def __init__(self, use_drission=True, cache=True, index=True, tabs=4, cf_timeout=40.0, spec_store=True,
+                 scheduler=None, archive=None, images=None):
+        # Record every fetch to a FetchArchive, or replay one (no browser, no network)
+        self.archive = archive
+        self.use_drission = use_drission and not (archive and archive.replaying) and has_drission()
         print(f"Initializing Scraper (DrissionPage={self.use_drission})...")
+        self._lock = threading.Lock()
+        # Seconds to wait for a Cloudflare challenge to clear, and how long it took
+        self.cf_timeout = cf_timeout
+        self.cf_stats = ClearanceStats()
+        # Pacing, concurrency caps and retries for every network fetch (pass one to share it)
+        self.scheduler = scheduler or FetchScheduler()
+        # Pass cache=False to always hit the site, or a PageCache to share one
+        if cache is True:
+            cache = PageCache()
+        self.cache = cache or None
+        if index is True:
+            index = CatalogIndex()
+        self.index = index or None
+        # Downloaded car images, deduplicated by content
+        self.images = images or ImageStore()
+        # Scraped specs per spec page; pipeline answers repeat requests from it
+        if spec_store is True:
+            spec_store = SpecStore()
+        self.spec_store = spec_store or None
 
         if self.use_drission:
             try:
                 # Use auto_port to avoid conflicts with existing processes
-                from DrissionPage import ChromiumOptions
+                from DrissionPage import ChromiumOptions, ChromiumPage
                 co = ChromiumOptions()
                 co.auto_port()
                 self.page = ChromiumPage(addr_or_opts=co)
                 self._load_cookies_drission()
+                # Each tab navigates one URL at a time; tabs share cookies/CF clearance
+                self.tabs = TabPool(self.page, size=tabs)
             except Exception as e:
                 print(f"DrissionPage init failed: {e}. Falling back to requests.")
                 self.use_drission = False
-                self.session = requests.Session()
+                self.session = self._new_session()
                 self._load_cookies_requests()
         else:
-            self.session = requests.Session()
+            self.session = self._new_session()
             self._load_cookies_requests()
 
             # Add headers
@@ -45,6 +87,14 @@ class CarScraper:
                 'Referer': self.BASE_URL
             })
 
+    def _new_session(self):
+        session = requests.Session()
+        if self.archive:
+            adapter = self.archive.adapter()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        return session
+
     def _load_cookies_drission(self):
         if os.path.exists(self.COOKIES_FILE):
              try:
@@ -66,66 +116,187 @@ class CarScraper:
                 self.session.cookies.update(c_dict)
              except: pass
 
-    def _get_soup(self, url):
+    def _get_html(self, url):
+        """Returns page HTML, served from the page cache when it is fresh."""
+        entry, html = self._cached_html(url)
+        if html is not None:
+            return html
+
         print(f"Navigating to {url}...")
 
         if self.use_drission:
-            self.page.get(url)
-            self.page.get(url)
-            # Smarter CF wait
-            for i in range(20): # 40 seconds max
-                title = self.page.title.lower()
-                if "just a moment" not in title and "один момент" not in title and "cloudflare" not in title:
-                    break
-                print(f"Waiting for Cloudflare... ({i+1}/20)")
-                time.sleep(2)
+            def attempt():
+                with self.tabs.checkout() as tab:
+                    tab.get(url)
+                    if is_challenge(tab.title):
+                        print("Waiting for Cloudflare...")
+                        with metrics.span("scrape.cloudflare_wait"):
+                            cleared_in = wait_for_clearance(tab, timeout=self.cf_timeout)
+                        self.cf_stats.record(cleared_in)
+                        if cleared_in is not None:
+                            print(f"Cloudflare cleared in {cleared_in:.2f}s")
+
+                    # Additional check for turnstile iframe if still stuck?
+                    if is_challenge(tab.title):
+                        raise Retry("Cloudflare challenge not cleared", throttle=True)
+                    return tab.html
 
-            # Additional check for turnstile iframe if still stuck?
-            return BeautifulSoup(self.page.html, 'html.parser')
+            try:
+                t0 = time.perf_counter()
+                with metrics.span("fetch.page"):
+                    html = self.scheduler.fetch(url, attempt)
+            except FetchError as e:
+                # Never cache the challenge page; prefer a stale copy if we have one
+                return self._stale_or_raise(entry, e)
+            if self.archive:
+                self.archive.record_page(url, html, time.perf_counter() - t0)
+            if self.cache:
+                self.cache.put(url, html)
+            return html
         else:
-            resp = self.session.get(url, timeout=15)
-            if resp.status_code != 200:
-                print(f"Error: Status {resp.status_code}")
-            return BeautifulSoup(resp.text, 'html.parser')
+            # Revalidate stale entries with ETag / Last-Modified when available
+            headers = entry.validators() if entry else {}
+
+            def attempt():
+                try:
+                    resp = self.session.get(url, headers=headers, timeout=15)
+                except requests.RequestException as e:
+                    raise Retry(type(e).__name__)
+                if resp.status_code in RETRY_STATUSES:
+                    raise Retry(f"status {resp.status_code}", resp.status_code, resp.headers.get('Retry-After'))
+                if is_challenge_response(resp.status_code, resp.headers, resp.text):
+                    raise Retry(f"Cloudflare challenge (status {resp.status_code})", resp.status_code,
+                                resp.headers.get('Retry-After'), throttle=True)
+                return resp
+
+            try:
+                with metrics.span("fetch.page"):
+                    resp = self.scheduler.fetch(url, attempt)
+            except FetchError as e:
+                return self._stale_or_raise(entry, e)
+            return self._handle_response(url, entry, resp.status_code, resp.text, resp.headers)
+
+    def _stale_or_raise(self, entry, error):
+        """Falls back to a stale cached copy of a page that could not be fetched."""
+        if entry:
+            print(f"Fetch failed ({error.reason}), using stale cached copy.")
+            return entry.html
+        raise error
+
+    def _cached_html(self, url):
+        """Returns (cache entry or None, HTML if the entry is fresh else None)."""
+        entry = self.cache.get(url) if self.cache else None
+        if self.cache:
+            metrics.cache_lookup('page', bool(entry and entry.fresh))
+        if entry and entry.fresh:
+            print(f"Cache hit for {url}")
+            return entry, entry.html
+        return entry, None
+
+    def _handle_response(self, url, entry, status, text, headers):
+        """Turns an HTTP response into page HTML, updating the page cache."""
+        if status == 304 and entry:
+            print("Not modified, using cached copy.")
+            self.cache.mark_fresh(url)
+            return entry.html
+        if status != 200:
+            print(f"Error: Status {status}")
+            return self._stale_or_raise(entry, FetchError(url, f"status {status}", status))
+        if self.cache:
+            self.cache.put(url, text,
+                           etag=headers.get('ETag'),
+                           last_modified=headers.get('Last-Modified'))
+        return text
+
+    def _get_soup(self, url, parse_only=None):
+        return make_soup(self._get_html(url), parse_only=parse_only)
+
+    def _get_links(self, url):
+        """Returns [(text, absolute_url)] for every link on the page, without building a full tree."""
+        html = self._get_html(url)
+        return html, self._absolute_links(html)
+
+    def _absolute_links(self, html):
+        return [(text, urljoin(self.BASE_URL, href)) for text, href in iter_links(html)]
 
     def close(self):
+        if self.cache:
+            self.cache.flush()
+        stats = self.cf_stats.summary()
+        if stats['challenges']:
+            print(f"Cloudflare: {stats['cleared']}/{stats['challenges']} challenges cleared, "
+                  f"median {stats['median_s']}s, max {stats['max_s']}s")
         if self.use_drission:
+            self.tabs.close()
             try: self.page.quit()
             except: pass
 
+    @metrics.timed("scrape.search")
     def search_make(self, make_name):
+        # 0. Resolve from the local catalog index without fetching anything
+        make_url = self._make_from_index(make_name)
+        if make_url:
+            return make_url
+
         # SIMPLIFIED SEARCH
         print(f"Searching for {make_name}...")
-        soup = self._get_soup(self.BASE_URL)
-
-        # 1. Look for direct link text
-        for a in soup.find_all('a', href=True):
-            if make_name.lower() == a.get_text(strip=True).lower():
-                return urljoin(self.BASE_URL, a['href'])
+        html, links = self._get_links(self.BASE_URL)
+        make_url = self._match_make(links, make_name, exact=True)
+        if make_url:
+            return make_url
 
         # 2. Check browse.php if not found
-        browse_url = urljoin(self.BASE_URL, "browse.php")
-        soup = self._get_soup(browse_url)
-        for a in soup.find_all('a', href=True):
-            if make_name.lower() in a.get_text(strip=True).lower():
-                 return urljoin(self.BASE_URL, a['href'])
-
+        html, links = self._get_links(urljoin(self.BASE_URL, "browse.php"))
+        make_url = self._match_make(links, make_name, exact=False)
+        if make_url:
+            return make_url
+
+        self._make_not_found(make_name, html)
+
+    def _make_from_index(self, make_name):
+        if self.index and self.index.has_makes():
+            make_url = self.index.find_make(make_name)
+            if make_url:
+                print(f"Found {make_name} in catalog index.")
+                return make_url
+        return None
+
+    def _match_make(self, links, make_name, exact):
+        """1. Exact link text (homepage) / 2. substring (browse.php)."""
+        if self.index:
+            self.index.add_makes(links)
+        for text, url in links:
+            if exact and make_name.lower() == text.lower():
+                return url
+            if not exact and make_name.lower() in text.lower():
+                return url
+        return None
+
+    def _make_not_found(self, make_name, html):
         # DEBUG: Dump HTML if failed
         with open("debug_failed_search.html", "w", encoding="utf-8") as f:
-            f.write(str(soup))
+            f.write(html)
         print("Dumping HTML to debug_failed_search.html")
 
-        raise ValueError(f"Make '{make_name}' not found. Page title: {soup.title}")
+        raise ValueError(f"Make '{make_name}' not found. Page title: {make_soup(html).title}")
 
+    @metrics.timed("scrape.models")
     def get_models(self, make_url, make_name=None):
-        soup = self._get_soup(make_url)
+        if self.index:
+            models = self.index.get_models(make_url)
+            if models:
+                return models
+
+        html = self._get_html(make_url)
+        models = self._parse_models(html)
+        self._remember_models(make_url, models, html)
+        return models
+
+    def _parse_models(self, html):
         models = []
 
         # Parse logic (simplified from original)
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            text = a.get_text(strip=True)
-
+        for text, href in iter_links(html):
             if '/model/' in href or '/make/' in href:
                 if len(text) > 2 and 'photo' not in href:
                     # Basic cleanup
@@ -135,17 +306,32 @@ class CarScraper:
                         'url': full_url,
                         'start_year': 0, 'end_year': 0 # formatting filler
                     })
+        return models
 
+    def _remember_models(self, make_url, models, html):
         if not models:
             print("[WARN] No models found. Dumping HTML to debug_models_dump.html")
             with open("debug_models_dump.html", "w", encoding="utf-8") as f:
-                f.write(str(soup))
-
-        return models
+                f.write(html)
+        elif self.index:
+            self.index.set_models(make_url, models)
 
 
+    @metrics.timed("scrape.submodels")
     def get_submodels(self, model_url):
-        soup = self._get_soup(model_url)
+        if self.index:
+            submodels = self.index.get_submodels(model_url)
+            if submodels:
+                return submodels
+
+        submodels = self._parse_submodels(self._get_html(model_url))
+        if submodels and self.index:
+            self.index.set_submodels(model_url, submodels)
+        return submodels
+
+    def _parse_submodels(self, html):
+        # Only the submodel tables are needed
+        soup = make_soup(html, parse_only=STRAIN_TABLES)
         submodels = []
 
         tables = soup.find_all('table')
@@ -197,8 +383,12 @@ class CarScraper:
 
         return submodels
 
+    @metrics.timed("scrape.specs")
     def get_specs(self, config_url):
-        soup = self._get_soup(config_url)
+        return self._parse_specs(self._get_html(config_url), config_url)
+
+    def _parse_specs(self, html, config_url):
+        soup = make_soup(html)
 
         # Initialize default specs
         specs = {
@@ -209,25 +399,10 @@ class CarScraper:
         # Get full text content
         text_content = soup.get_text(" ", strip=True)
         # Normalize spaces
-        text_content = re.sub(r'\s+', ' ', text_content)
-
-        # Patterns
-        patterns = {
-            'engine': [r'displacement[\s\:]*(\d+[\s]*cm3)', r'capacity[\s\:]*(\d+[\s]*cm3)', r'(\d+\s*cu\s*in)'],
-            'power': [r'power[\s\:]*[\d\.,\s]*kW[\s/]*(\d+[\s]*hp)', r'power[\s\:]*.*?(\d+[\s]*PS)', r'(\d+[\s]*PS)', r'(\d+[\s]*hp)'],
-            'torque': [r'torque[\s\:]*(\d+[\s]*Nm)', r'torque[\s\:]*[\d\.,\s]*Nm[\s/]*(\d+[\s]*lb-ft)', r'(\d+[\s]*Nm)', r'(\d+[\s]*lb-ft)'],
-            'year': [r'(?:manufactured|sold).*?in[\s]*(\d{4})'],
-            'top_speed': [r'top[\s]*speed[\s\:]*(\d+)', r'(\d+)\s*km/h', r'(\d+)\s*mph'],
-            '0-100': [r'0-[\s]*100[\s]*km/h[\s\:]*(\d+\.?\d*)', r'0-[\s]100[\s]*km/h[\s]*(\d+\.?\d*)', r'0-\s*60\s*mph\s*(\d+\.?\d*)'],
-            'weight': [r'curb[\s]*weight[\s\:]*(\d+[\s]*kg)', r'weight[\s\:]*(\d+[\s]*kg)']
-        }
+        text_content = normalize_text(text_content)
 
-        for key, pat_list in patterns.items():
-            for pat in pat_list:
-                m = re.search(pat, text_content, re.IGNORECASE)
-                if m:
-                    specs[key] = m.group(1)
-                    break
+        # Single pass over the text (see src/spec_extract.py for the patterns)
+        specs.update(extract_specs(text_content))
 
         # Fallback Year from Title
         if specs['year'] == 'N/A' or not specs['year']:
@@ -317,24 +492,24 @@ class CarScraper:
 
         return specs
 
-    def download_image(self, url, path):
-        print(f"Downloading {url} to {path}...")
-        if not url: return False
-
-        # Ensure directory exists
-        import os
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+    @metrics.timed("scrape.image")
+    def fetch_image(self, url):
+        """Returns a local path to the image at url, downloading it only if the store lacks it."""
+        print(f"Fetching image {url}...")
+        if not url: return None
 
-        # Force delete old file to avoid using stale image
-        if os.path.exists(path):
-            try: os.remove(path)
-            except: pass
+        # A fresh stored copy needs no rate token or host slot
+        entry = self.images.lookup(url)
+        if entry and entry['fresh']:
+            print("Image already in store.")
+            return entry['path']
 
         try:
             # 1. Try requests with LIVE cookies (most efficient)
             if not hasattr(self, 'session'):
-                import requests
-                self.session = requests.Session()
+                with self._lock:
+                    if not hasattr(self, 'session'):
+                        self.session = self._new_session()
 
             if self.use_drission and hasattr(self, 'page'):
                 try:
@@ -342,45 +517,60 @@ class CarScraper:
                     self.session.cookies.update(c_dict)
                 except: pass
 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Referer': self.BASE_URL,
-                'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8'
-            }
-
-            resp = self.session.get(url, headers=headers, timeout=20)
-            if resp.status_code == 200:
-                with open(path, 'wb') as f:
-                    f.write(resp.content)
+            def attempt():
+                try:
+                    return self.images.fetch(self.session, url, entry, headers=self.IMAGE_HEADERS)
+                except requests.RequestException as e:
+                    raise Retry(type(e).__name__)
+
+            try:
+                path = self.scheduler.fetch(url, attempt)
+            except FetchError as e:
+                print(f"Image download failed: {e.reason}")
+                path = None
+            if path:
                 print("Download success via requests.")
-                return True
+                return path
 
             # 2. Try DrissionPage Screenshot (The Foolproof Way)
             if self.use_drission and hasattr(self, 'page'):
                 print("Requests failed. Attempting screenshot capture...")
+                tmp, f = self.images.temp_file(suffix='.png')
+                f.close()
                 try:
-                    # Navigate to the image directly
-                    self.page.get(url)
-                    # Wait for image to render
-                    import time
-                    time.sleep(2)
-                    # Save screenshot of the whole page (image usually takes full visible area)
-                    # We can also try to find the img element
-                    img_ele = self.page.ele('tag:img')
-                    if img_ele:
-                        img_ele.get_screenshot(path=path)
-                    else:
-                        self.page.get_screenshot(path)
-
-                    if os.path.exists(path) and os.path.getsize(path) > 1000:
+                    with self.tabs.checkout() as tab:
+                        # Navigate to the image directly
+                        tab.get(url)
+                        # Wait for image to render
+                        time.sleep(2)
+                        # Save screenshot of the whole page (image usually takes full visible area)
+                        # We can also try to find the img element
+                        img_ele = tab.ele('tag:img')
+                        if img_ele:
+                            img_ele.get_screenshot(path=tmp)
+                        else:
+                            tab.get_screenshot(tmp)
+
+                    if os.path.exists(tmp) and os.path.getsize(tmp) > 1000:
                         print("Download success via screenshot.")
-                        return True
+                        return self.images.ingest(url, tmp, content_type='image/png')
                 except Exception as screenshot_err:
                     print(f"Screenshot capture failed: {screenshot_err}")
+                if os.path.exists(tmp):
+                    os.remove(tmp)
 
-            print(f"All download methods failed (Last status: {resp.status_code if 'resp' in locals() else 'N/A'})")
-            return False
+            print("All download methods failed")
+            return None
 
         except Exception as e:
             print(f"Global download exception: {str(e).encode('ascii', errors='ignore').decode()}")
+            return None
+
+    def download_image(self, url, path):
+        """Fetches url through the image store and copies it to path."""
+        print(f"Downloading {url} to {path}...")
+        stored = self.fetch_image(url)
+        if not stored:
             return False
+        ImageStore.copy_to(stored, path)
+        return True
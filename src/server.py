@@ -0,0 +1,190 @@
+"""
+Local HTTP poster service.
+
+    GET /poster?make=Audi&model=TT RS&format=webp@540:80
+
+Scraped car data and encoded posters are kept in memory. Identical
+requests arriving while a scrape or render is in progress wait for that
+one call instead of starting their own, so a cold key costs one upstream
+scrape. Responses carry an ETag derived from the data hash.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.concurrency import SingleFlight
+from src.output_spec import parse_output_spec
+from src.pipeline import scrape_car_data
+
+CHUNK_SIZE = 64 * 1024
+
+
+class LRUCache:
+    """Thread-safe LRU mapping bounded by the total sizeof() of its values (bytes by default), with an optional TTL."""
+
+    def __init__(self, max_size=256 * 1024 * 1024, ttl=None, sizeof=len):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, stored_at = item
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._items[key]
+                self.size -= self.sizeof(value)
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= self.sizeof(old[0])
+            self._items[key] = (value, time.time())
+            self.size += self.sizeof(value)
+            while self.size > self.max_size and len(self._items) > 1:
+                _, (evicted, _) = self._items.popitem(last=False)
+                self.size -= self.sizeof(evicted)
+
+
+class PosterService:
+    """Scrape + render with in-memory caches and request coalescing; independent of HTTP."""
+
+    def __init__(self, scraper, poster_gen, cache_bytes=256 * 1024 * 1024, data_ttl=3600,
+                 render_workers=None):
+        self.scraper = scraper
+        self.poster_gen = poster_gen
+        self.car_data = LRUCache(max_size=4096, ttl=data_ttl, sizeof=lambda _: 1)  # entries, not bytes
+        self.posters = LRUCache(max_size=cache_bytes)
+        self.flight = SingleFlight()
+        # Rendering is CPU-bound: don't run more renders than cores at once
+        self._render_slots = threading.Semaphore(render_workers or os.cpu_count() or 1)
+
+    def get_car_data(self, make, model=None):
+        key = (make.strip().lower(), (model or '').strip().lower())
+        data = self.car_data.get(key)
+        if data is not None:
+            return data
+
+        def scrape():
+            data = scrape_car_data(self.scraper, make, model)
+            self.car_data.put(key, data)
+            return data
+        return self.flight.do(('scrape',) + key, scrape)
+
+    @staticmethod
+    def poster_key(car_data, variant):
+        """Hash of everything that affects the rendered bytes."""
+        blob = json.dumps(car_data, sort_keys=True, ensure_ascii=False) + "|" + repr(variant)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def get_poster(self, make, model=None, variant=None):
+        """
+        Returns (key, body, content_type) for the poster of make/model. variant
+        is an OutputVariant or spec item ("webp@540:80"); default is the
+        generator's first output variant.
+        """
+        if variant is None:
+            variant = self.poster_gen.output_spec[0]
+        elif isinstance(variant, str):
+            variant = parse_output_spec(variant)[0]
+        car_data = self.get_car_data(make, model)
+        key = self.poster_key(car_data, variant)
+        body = self.posters.get(key)
+        if body is None:
+            def render():
+                with self._render_slots:
+                    body = self.poster_gen.render_bytes(car_data, variant)
+                self.posters.put(key, body)
+                return body
+            body = self.flight.do(('render', key), render)
+        return key, body, variant.content_type
+
+
+class PosterRequestHandler(BaseHTTPRequestHandler):
+    service = None  # set by make_server
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle delay the second
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/poster':
+            return self._send_json(404, {'error': 'not found'})
+
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        make = params.get('make', '').strip()
+        if not make:
+            return self._send_json(400, {'error': "missing 'make'"})
+
+        try:
+            variant = parse_output_spec(params['format'])[0] if params.get('format') else None
+        except ValueError as e:
+            return self._send_json(400, {'error': str(e)})
+
+        try:
+            key, body, content_type = self.service.get_poster(make, params.get('model'), variant)
+        except ValueError as e:
+            # Make/model not found in the catalog
+            return self._send_json(404, {'error': str(e)})
+        except Exception as e:
+            return self._send_json(502, {'error': str(e)})
+
+        etag = f'"{key[:32]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'public, max-age=3600')
+        self.end_headers()
+        view = memoryview(body)
+        for start in range(0, len(body), CHUNK_SIZE):
+            self.wfile.write(view[start:start + CHUNK_SIZE])
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"[HTTP] {self.address_string()} {format % args}")
+
+
+def make_server(service, host="127.0.0.1", port=8000):
+    handler = type('Handler', (PosterRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(scraper, poster_gen, host="127.0.0.1", port=8000):
+    server = make_server(PosterService(scraper, poster_gen), host, port)
+    print(f"Poster service listening on http://{host}:{port}/poster?make=...&model=...&format=png")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
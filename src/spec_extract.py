@@ -0,0 +1,160 @@
+"""
+Single-pass spec extraction for CarScraper.get_specs.
+
+SPEC_PATTERNS is the original per-key pattern list: for every key the first
+pattern that matches anywhere in the page text wins. extract_specs returns
+exactly that result, but walks a lowercased copy of the text once with one
+keyword scanner (plus one number+unit scan, only when a fallback is needed)
+instead of running ~20 separate IGNORECASE searches over it.
+"""
+import re
+
+# Priority-ordered patterns per key (reference semantics)
+SPEC_PATTERNS = {
+    'engine': [r'displacement[\s\:]*(\d+[\s]*cm3)', r'capacity[\s\:]*(\d+[\s]*cm3)', r'(\d+\s*cu\s*in)'],
+    'power': [r'power[\s\:]*[\d\.,\s]*kW[\s/]*(\d+[\s]*hp)', r'power[\s\:]*.*?(\d+[\s]*PS)', r'(\d+[\s]*PS)', r'(\d+[\s]*hp)'],
+    'torque': [r'torque[\s\:]*(\d+[\s]*Nm)', r'torque[\s\:]*[\d\.,\s]*Nm[\s/]*(\d+[\s]*lb-ft)', r'(\d+[\s]*Nm)', r'(\d+[\s]*lb-ft)'],
+    'year': [r'(?:manufactured|sold).*?in[\s]*(\d{4})'],
+    'top_speed': [r'top[\s]*speed[\s\:]*(\d+)', r'(\d+)\s*km/h', r'(\d+)\s*mph'],
+    '0-100': [r'0-[\s]*100[\s]*km/h[\s\:]*(\d+\.?\d*)', r'0-[\s]100[\s]*km/h[\s]*(\d+\.?\d*)', r'0-\s*60\s*mph\s*(\d+\.?\d*)'],
+    'weight': [r'curb[\s]*weight[\s\:]*(\d+[\s]*kg)', r'weight[\s\:]*(\d+[\s]*kg)']
+}
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Precompiled reference patterns, used when lowercasing would not be
+# equivalent to IGNORECASE (see _FOLD_SPECIAL)
+_COMPILED = {key: [re.compile(p, re.IGNORECASE) for p in pats] for key, pats in SPEC_PATTERNS.items()}
+
+# Characters IGNORECASE matches to an ASCII letter although str.lower() does
+# not map them to it (dotted/dotless i, long s)
+_FOLD_SPECIAL = re.compile('[İıſ]')
+
+
+def _lower(pattern):
+    # Patterns are run case-sensitively on lowercased text
+    return re.compile(pattern.replace('kW', 'kw').replace('PS', 'ps').replace('Nm', 'nm'))
+
+
+# Every keyword a pattern can start with. A branch of plain literals lets the
+# regex engine skip straight to candidate characters.
+_KEYWORDS = re.compile(r'displacement|capacity|power|torque|manufactured|sold|top|curb|weight|0-')
+
+# Patterns anchored at a keyword hit: keyword -> [(key, priority, compiled)]
+_KEYWORD_PATTERNS = {
+    'displacement': [('engine', 0, _lower(SPEC_PATTERNS['engine'][0]))],
+    'capacity': [('engine', 1, _lower(SPEC_PATTERNS['engine'][1]))],
+    'power': [('power', 0, _lower(SPEC_PATTERNS['power'][0]))],
+    'torque': [('torque', 0, _lower(SPEC_PATTERNS['torque'][0])),
+               ('torque', 1, _lower(SPEC_PATTERNS['torque'][1]))],
+    'top': [('top_speed', 0, _lower(SPEC_PATTERNS['top_speed'][0]))],
+    'curb': [('weight', 0, _lower(SPEC_PATTERNS['weight'][0]))],
+    'weight': [('weight', 1, _lower(SPEC_PATTERNS['weight'][1]))],
+    '0-': [('0-100', i, _lower(p)) for i, p in enumerate(SPEC_PATTERNS['0-100'])],
+}
+
+# At the first digit of a number \d+ always takes the whole run and \s* all
+# following spaces, so at most one unit can follow: one scan covers all the
+# bare "<number> <unit>" fallbacks.
+_NUMBER_UNIT = re.compile(r'(\d+)\s*(cu\s*in|ps|hp|nm|lb-ft|km/h|mph)')
+
+# First letter of the unit -> (key, priority, value is digits only)
+_UNIT_TARGETS = {
+    'c': ('engine', 2, False),
+    'p': ('power', 2, False),
+    'h': ('power', 3, False),
+    'n': ('torque', 2, False),
+    'l': ('torque', 3, False),
+    'k': ('top_speed', 1, True),
+    'm': ('top_speed', 2, True),
+}
+# Best priority a unit match can give each key
+_UNIT_BEST = {'engine': 2, 'power': 2, 'torque': 2, 'top_speed': 1}
+
+# Lazy ".*?" patterns are resolved from the first keyword hit with one
+# forward search instead of backtracking over the rest of the page.
+_POWER_PREFIX = re.compile(r'power[\s\:]*')
+_PS = re.compile(r'(\d+[\s]*ps)')
+_YEAR_IN = re.compile(r'in[\s]*(\d{4})')
+
+
+def normalize_text(text):
+    return WHITESPACE_RE.sub(' ', text)
+
+
+def _extract_reference(text):
+    specs = {}
+    for key, pats in _COMPILED.items():
+        for pat in pats:
+            m = pat.search(text)
+            if m:
+                specs[key] = m.group(1)
+                break
+    return specs
+
+
+def extract_specs(text):
+    """
+    Returns {key: value} for every key of SPEC_PATTERNS found in text,
+    identical to trying each key's patterns in order with re.search.
+    text must already be whitespace-normalized (see normalize_text).
+    """
+    low = text.lower()
+    if len(low) != len(text) or (not text.isascii() and _FOLD_SPECIAL.search(text)):
+        return _extract_reference(text)
+
+    found = {key: {} for key in SPEC_PATTERNS}
+    power_at = None
+    year_kw_end = None
+    pending = set(SPEC_PATTERNS)
+
+    # Keywords may overlap ("weightop speed"), so resume one character after
+    # each hit instead of after the whole keyword.
+    m = _KEYWORDS.search(low)
+    while m:
+        pos = m.start()
+        kw = m.group()
+        if kw in ('manufactured', 'sold'):
+            if year_kw_end is None:
+                year_kw_end = m.end()
+                pending.discard('year')
+        else:
+            if kw == 'power' and power_at is None:
+                power_at = pos
+            for key, prio, pat in _KEYWORD_PATTERNS[kw]:
+                if prio not in found[key]:
+                    pm = pat.match(low, pos)
+                    if pm:
+                        found[key][prio] = text[pm.start(1):pm.end(1)]
+                        if prio == 0:
+                            pending.discard(key)
+        if not pending:
+            break
+        m = _KEYWORDS.search(low, pos + 1)
+
+    # power[\s\:]*.*?(\d+[\s]*PS): first PS after the first "power"
+    if 0 not in found['power'] and power_at is not None:
+        pm = _PS.search(low, _POWER_PREFIX.match(low, power_at).end())
+        if pm:
+            found['power'][1] = text[pm.start(1):pm.end(1)]
+
+    # Bare "<number> <unit>" fallbacks, only for keys nothing better matched
+    needed = {key for key, best in _UNIT_BEST.items() if not found[key] or min(found[key]) > best}
+    if needed:
+        for um in _NUMBER_UNIT.finditer(low):
+            key, prio, digits_only = _UNIT_TARGETS[um.group(2)[0]]
+            if key in needed and prio not in found[key]:
+                group = 1 if digits_only else 0
+                found[key][prio] = text[um.start(group):um.end(group)]
+                if prio == _UNIT_BEST[key]:
+                    needed.discard(key)
+                    if not needed:
+                        break
+
+    # (?:manufactured|sold).*?in[\s]*(\d{4}): first "in <year>" after the first keyword
+    if year_kw_end is not None:
+        ym = _YEAR_IN.search(low, year_kw_end)
+        if ym:
+            found['year'][0] = text[ym.start(1):ym.end(1)]
+
+    return {key: hits[min(hits)] for key, hits in found.items() if hits}
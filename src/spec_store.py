@@ -0,0 +1,131 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from src.catalog_index import normalize_name
+
+DAY = 24 * 3600
+
+
+class SpecStore:
+    """
+    Scraped car data, persisted in SQLite.
+
+    `cars` holds one row per spec page (keyed by its navigation URL) with the
+    make, model and submodel it was reached through, the extracted specs,
+    the image reference and when it was scraped. `queries` maps a
+    (make, model) request to the spec page it resolved to, so a repeated
+    request is answered without any catalog navigation.
+    """
+
+    def __init__(self, path="cache/specs.sqlite", max_age=30 * DAY):
+        self.path = path
+        self.max_age = max_age
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS cars (
+                    config_url TEXT PRIMARY KEY,
+                    make TEXT NOT NULL,
+                    make_url TEXT,
+                    model_name TEXT NOT NULL,
+                    model_url TEXT,
+                    submodel_name TEXT,
+                    specs TEXT NOT NULL,
+                    image_url TEXT,
+                    image_path TEXT,
+                    scraped_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS queries (
+                    make_key TEXT NOT NULL,
+                    model_key TEXT NOT NULL,
+                    make TEXT NOT NULL,
+                    model TEXT,
+                    config_url TEXT NOT NULL,
+                    PRIMARY KEY (make_key, model_key)
+                );
+            """)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _query_key(make, model):
+        return normalize_name(make), normalize_name(model or '')
+
+    def _row_to_record(self, row):
+        keys = ('config_url', 'make', 'make_url', 'model_name', 'model_url', 'submodel_name',
+                'specs', 'image_url', 'image_path', 'scraped_at')
+        record = dict(zip(keys, row))
+        record['specs'] = json.loads(record['specs'])
+        record['stale'] = (time.time() - record['scraped_at']) > self.max_age
+        return record
+
+    def find(self, make, model=None):
+        """Returns the stored record for a (make, model) request, or None."""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT c.config_url, c.make, c.make_url, c.model_name, c.model_url, c.submodel_name, "
+                "c.specs, c.image_url, c.image_path, c.scraped_at "
+                "FROM queries q JOIN cars c ON c.config_url = q.config_url "
+                "WHERE q.make_key = ? AND q.model_key = ?",
+                self._query_key(make, model)).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def get_car(self, config_url):
+        """Returns the stored record for a spec page URL, or None."""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT config_url, make, make_url, model_name, model_url, submodel_name, "
+                "specs, image_url, image_path, scraped_at FROM cars WHERE config_url = ?",
+                (config_url,)).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def put(self, make, model, config_url, specs, make_url=None, model_name='', model_url=None,
+            submodel_name=None, image_path=None):
+        """Stores a freshly scraped spec page and records that (make, model) resolves to it."""
+        with self._connect() as db:
+            self._put_car(db, config_url, make, specs, make_url, model_name, model_url,
+                          submodel_name, image_path)
+            db.execute(
+                "INSERT OR REPLACE INTO queries (make_key, model_key, make, model, config_url) "
+                "VALUES (?, ?, ?, ?, ?)",
+                self._query_key(make, model) + (make, model, config_url))
+
+    def put_car(self, config_url, make, specs, make_url=None, model_name='', model_url=None,
+                submodel_name=None, image_path=None):
+        """Stores a spec page without tying it to a (make, model) request (used by the crawler)."""
+        with self._connect() as db:
+            self._put_car(db, config_url, make, specs, make_url, model_name, model_url,
+                          submodel_name, image_path)
+
+    @staticmethod
+    def _put_car(db, config_url, make, specs, make_url, model_name, model_url, submodel_name, image_path):
+        db.execute(
+            "INSERT OR REPLACE INTO cars (config_url, make, make_url, model_name, model_url, "
+            "submodel_name, specs, image_url, image_path, scraped_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (config_url, make, make_url, model_name, model_url, submodel_name,
+             json.dumps(specs, ensure_ascii=False), specs.get('image_url'), image_path, time.time()))
+
+    def set_image_path(self, config_url, image_path):
+        with self._connect() as db:
+            db.execute("UPDATE cars SET image_path = ? WHERE config_url = ?", (image_path, config_url))
+
+    def stale_cars(self):
+        """Records of every stored spec page older than max_age, oldest first (whoever stored them)."""
+        cutoff = time.time() - self.max_age
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT config_url, make, make_url, model_name, model_url, submodel_name, "
+                "specs, image_url, image_path, scraped_at FROM cars WHERE scraped_at < ? "
+                "ORDER BY scraped_at", (cutoff,)).fetchall()
+        return [self._row_to_record(row) for row in rows]
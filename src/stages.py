@@ -0,0 +1,116 @@
+"""
+Thread-based staged pipeline with bounded queues.
+
+Items flow through a fixed list of stages (e.g. scrape -> image -> cutout ->
+render). Every stage has its own worker threads and a bounded input queue:
+when a stage falls behind, its queue fills up and the stage before it
+blocks (backpressure) instead of piling up work in memory. Network-bound
+and CPU-bound stages therefore run at the same time, and the total time
+approaches that of the slowest stage rather than the sum of all of them.
+"""
+import queue
+import threading
+import time
+
+from src import metrics
+
+_DONE = object()
+
+
+class Stage:
+    def __init__(self, name, fn, workers=1, queue_size=None):
+        """fn(item) -> item for the next stage; raising drops the item from the rest of the pipeline."""
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue_size = queue_size or 2 * self.workers
+        self.items = 0
+        self.busy = 0.0     # seconds spent in fn, summed over workers
+        self.blocked = 0.0  # seconds spent waiting for room in the next stage's queue
+        self._lock = threading.Lock()
+
+    def add_stats(self, busy, blocked):
+        with self._lock:
+            self.items += 1
+            self.busy += busy
+            self.blocked += blocked
+
+
+class StagedPipeline:
+    def __init__(self, stages):
+        self.stages = stages
+        self.elapsed = 0.0
+
+    def run(self, items):
+        """
+        Feeds items through the stages. Yields (index, item, stage_name, error)
+        in completion order: error is None and stage_name the last stage for
+        an item that went through every stage, otherwise the stage that
+        failed and its exception.
+        """
+        started = time.perf_counter()
+        queues = [queue.Queue(maxsize=s.queue_size) for s in self.stages]
+        results = queue.Queue()
+        remaining = [s.workers for s in self.stages]
+        lock = threading.Lock()
+
+        def feed():
+            for index, item in enumerate(items):
+                queues[0].put((index, item))
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+
+        def work(i):
+            stage = self.stages[i]
+            last = i == len(self.stages) - 1
+            out = results if last else queues[i + 1]
+            while True:
+                job = queues[i].get()
+                if job is _DONE:
+                    break
+                index, item = job
+                t0 = time.perf_counter()
+                try:
+                    with metrics.span("stage." + stage.name):
+                        item = stage.fn(item)
+                except Exception as e:
+                    stage.add_stats(time.perf_counter() - t0, 0.0)
+                    results.put((index, item, stage.name, e))
+                    continue
+                t1 = time.perf_counter()
+                out.put((index, item, stage.name, None) if last else (index, item))
+                stage.add_stats(t1 - t0, time.perf_counter() - t1)
+
+            # The last worker of a stage to finish tells the next stage there is nothing more
+            with lock:
+                remaining[i] -= 1
+                finished = remaining[i] == 0
+            if finished:
+                if last:
+                    results.put(_DONE)
+                else:
+                    for _ in range(self.stages[i + 1].workers):
+                        queues[i + 1].put(_DONE)
+
+        threads = [threading.Thread(target=feed, name="stage-feed", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            threads += [threading.Thread(target=work, args=(i,), name=f"stage-{stage.name}-{n}", daemon=True)
+                        for n in range(stage.workers)]
+        for t in threads:
+            t.start()
+
+        while True:
+            result = results.get()
+            if result is _DONE:
+                break
+            yield result
+        for t in threads:
+            t.join()
+        self.elapsed = time.perf_counter() - started
+
+    def report(self):
+        """Per-stage utilization: which stage bounds the wall time, and which ones waited on the next."""
+        print(f"{'stage':10} {'workers':>7} {'items':>6} {'busy s':>8} {'util':>6} {'blocked s':>10}")
+        for s in self.stages:
+            util = s.busy / (s.workers * self.elapsed) if self.elapsed else 0.0
+            print(f"{s.name:10} {s.workers:>7} {s.items:>6} {s.busy:>8.2f} {util:>6.0%} {s.blocked:>10.2f}")
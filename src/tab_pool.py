@@ -0,0 +1,61 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class TabPool:
+    """
+    Pool of tabs in one Chromium browser.
+
+    All tabs share the browser profile, so cookies and the Cloudflare
+    clearance obtained in one tab are valid in every other. Tabs are opened
+    lazily up to `size`; checkout() blocks while all of them are busy.
+    """
+
+    def __init__(self, page, size=4):
+        self.page = page
+        self.size = max(1, size)
+        self._idle = queue.Queue()
+        self._idle.put(page)
+        self._extra_tabs = []
+        self._created = 1
+        self._lock = threading.Lock()
+
+    def _acquire(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            grow = self._created < self.size
+            if grow:
+                self._created += 1
+        if grow:
+            try:
+                tab = self.page.new_tab()
+                with self._lock:
+                    self._extra_tabs.append(tab)
+                return tab
+            except Exception as e:
+                print(f"[WARN] Could not open a new tab: {e}")
+                with self._lock:
+                    self._created -= 1
+
+        return self._idle.get(timeout=timeout)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """Borrows a tab for the duration of the with-block."""
+        tab = self._acquire(timeout)
+        try:
+            yield tab
+        finally:
+            self._idle.put(tab)
+
+    def close(self):
+        with self._lock:
+            tabs, self._extra_tabs = self._extra_tabs, []
+        for tab in tabs:
+            try: tab.close()
+            except: pass
@@ -0,0 +1,18 @@
+"""
+CatalogIndex make lookups, in memory and after reopening the SQLite file.
+
+    python -m pytest tests
+"""
+from src.catalog_index import CatalogIndex
+
+
+def test_readding_make_updates_url(tmp_path):
+    path = str(tmp_path / "catalog_index.sqlite")
+    index = CatalogIndex(path)
+    index.add_makes([("Audi", "/make/audi.html"), ("Home", "/index.html")])
+    assert index.find_make("audi") == "/make/audi.html"
+    assert index.find_make("home") is None
+
+    index.add_makes([("AUDI", "/make/audi-2.html")])
+    assert index.find_make("Audi") == "/make/audi-2.html"
+    assert CatalogIndex(path).find_make("Audi") == "/make/audi-2.html"
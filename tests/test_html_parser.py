@@ -0,0 +1,119 @@
+"""
+Every html_parser backend must return the same links, trees and parsed
+submodels / specs as the html.parser reference.
+
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+import src.html_parser as html_parser
+from src.scraper_robust import CarScraper
+
+FIXTURE_PAGES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "fixtures", "pages")
+
+BACKENDS = ['auto', 'lxml', 'selectolax']
+
+SNIPPETS = [
+    '<a href="/x">Foo<script>var a</script></a>',
+    '<a href="/x">Foo<style>.a{}</style> Bar</a>',
+    '<a href=/a>one<a href=/b>two',
+    '<a href=/a>one<a href=/b>two</a>three</a>',
+    '<p><a href="/x">in p</p>rest</a>',
+    '<p><a href=/x>a<div>b</div></a></p>',
+    '<a href="/x">A<!-- c -->B</a>',
+    '<a href="/x">&amp; <b>bold</b>\n  x</a>',
+    '<a href="/x">x<b>y</a>z',
+    '<a href="/x">a<br>b</a><A HREF="/Y">up</A >',
+    '<a href="">e</a><a>no href</a><a href>empty</a>',
+    '<title><a href=/t>t</a></title><a href=/u>u</a>',
+    '<script>"<a href=/s>"</script><a href=/u>u</a>',
+    '<table><a href=/t>t</a><tr><td>c</td></tr></table>',
+    '<a title="x>y" href=/b>q</a>',
+    '<a href="/x"/>self-closed',
+]
+
+# A submodel table whose name and description <p> hold block elements,
+# which lxml would move out of the <p>
+SUBMODEL_TABLE = (
+    '<table><tr><td><img src="/picto30/a.jpg">'
+    '<p style="font-size:14pt">T<table><tr><td>inner</td></tr></table></p>'
+    '<p style="font-size:12pt">Cars belonging to T, years 2001 - 2005<div>more</div></p>'
+    '<a href="/make/x/y.html">specs</a></td></tr></table>'
+)
+
+TREE_SNIPPETS = [
+    SUBMODEL_TABLE,
+    '<p>a<div>b</div>c</p>',
+    '<p>a<p>b</p></p>',
+    '<p>a<ul><li>b</li></ul></p><title>t</title>',
+    '<div><p>open<div>x</div>',
+    '<table><tr><td>a</td></tr><p>stray</p></table>',
+]
+
+
+def fixture_pages():
+    if not os.path.isdir(FIXTURE_PAGES):
+        return []
+    return sorted(os.path.relpath(os.path.join(root, name), FIXTURE_PAGES)
+                  for root, _, names in os.walk(FIXTURE_PAGES) for name in names)
+
+
+def links(backend, html, monkeypatch):
+    monkeypatch.setattr(html_parser, 'BACKEND', backend)
+    return html_parser.iter_links(html)
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    if request.param == 'lxml' and not html_parser.HAS_LXML:
+        pytest.skip("lxml not installed")
+    if request.param == 'selectolax' and not html_parser.HAS_SELECTOLAX:
+        pytest.skip("selectolax not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("html", SNIPPETS)
+def test_snippet_links_match_reference(backend, html, monkeypatch):
+    assert links(backend, html, monkeypatch) == links('html.parser', html, monkeypatch)
+
+
+@pytest.mark.parametrize("page", fixture_pages())
+def test_fixture_page_links_match_reference(backend, page, monkeypatch):
+    with open(os.path.join(FIXTURE_PAGES, page), encoding='utf-8', errors='replace') as f:
+        html = f.read()
+    assert links(backend, html, monkeypatch) == links('html.parser', html, monkeypatch)
+
+
+def parser():
+    # The parsers only read BASE_URL, so skip the network / browser setup
+    return CarScraper.__new__(CarScraper)
+
+
+@pytest.mark.parametrize("html", TREE_SNIPPETS)
+def test_snippet_trees_match_reference(backend, html, monkeypatch):
+    monkeypatch.setattr(html_parser, 'BACKEND', backend)
+    assert str(html_parser.make_soup(html)) == str(html_parser.BeautifulSoup(html, 'html.parser'))
+    tables = html_parser.make_soup(html, parse_only=html_parser.STRAIN_TABLES)
+    assert str(tables) == str(html_parser.BeautifulSoup(html, 'html.parser', parse_only=html_parser.STRAIN_TABLES))
+
+
+def test_submodel_block_in_p(backend, monkeypatch):
+    monkeypatch.setattr(html_parser, 'BACKEND', backend)
+    [submodel] = parser()._parse_submodels(SUBMODEL_TABLE)
+    assert submodel['name'] == 'Tinner'
+    assert submodel['description'].endswith('more')
+    assert submodel['year'] == '2001-2005'
+
+
+@pytest.mark.parametrize("page", fixture_pages())
+def test_fixture_page_parse_matches_reference(backend, page, monkeypatch):
+    with open(os.path.join(FIXTURE_PAGES, page), encoding='utf-8', errors='replace') as f:
+        html = f.read()
+    url = CarScraper.BASE_URL + page.replace(os.sep, '/')
+    results = []
+    for name in ('html.parser', backend):
+        monkeypatch.setattr(html_parser, 'BACKEND', name)
+        results.append((parser()._parse_submodels(html), parser()._parse_specs(html, url)))
+    assert results[0] == results[1]